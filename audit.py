@@ -0,0 +1,179 @@
+"""
+Quick audit: estimate failure rates from a sample of a large UoM file.
+"""
+import math
+import time
+from collections import Counter
+from statistics import NormalDist
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from validators import COLUMNS, RESULT_COLUMNS, TEXT_DTYPES, evaluate_frame
+
+CHUNK_SIZE = 200_000
+# Rows validated at a time when stopping after a number of failures
+VALIDATION_BLOCK = 1_000
+
+def wilson_interval(failures: int, total: int, confidence: float = 0.95) -> Tuple[float, float]:
+    """Wilson score interval for a proportion.
+
+    Args:
+        failures: Number of failures observed
+        total: Number of rows observed
+        confidence: Confidence level of the interval
+
+    Returns:
+        Tuple of (low, high) bounds of the failure rate
+    """
+    if not total:
+        return 0.0, 1.0
+    z = NormalDist().inv_cdf((1 + confidence) / 2)
+    p = failures / total
+    denominator = 1 + z * z / total
+    center = (p + z * z / (2 * total)) / denominator
+    margin = z * math.sqrt(p * (1 - p) / total + z * z / (4 * total * total)) / denominator
+    return max(0.0, center - margin), min(1.0, center + margin)
+
+def _estimate(failures: int, total: int, confidence: float) -> Dict[str, Any]:
+    low, high = wilson_interval(failures, total, confidence)
+    return {
+        "rows": total,
+        "failures": failures,
+        "rate": failures / total if total else 0.0,
+        "low": low,
+        "high": high,
+    }
+
+def _reservoir(chunks: Iterator[pd.DataFrame], size: int,
+               rng: np.random.Generator) -> Tuple[pd.DataFrame, int]:
+    """Keep a uniform random sample of rows while streaming chunks.
+
+    Each row gets a random key and the rows with the smallest keys are kept,
+    which is a uniform sample without replacement. The sample is returned in
+    key order, i.e. shuffled.
+    """
+    sample = pd.DataFrame()
+    rows_read = 0
+    for chunk in chunks:
+        rows_read += len(chunk)
+        chunk = chunk.assign(_key=rng.random(len(chunk)))
+        if len(sample) + len(chunk) > size:
+            if len(sample) == size:
+                # Only rows below the current largest kept key can enter.
+                chunk = chunk[chunk["_key"] < sample["_key"].max()]
+            sample = pd.concat([sample, chunk]).nsmallest(size, "_key")
+        else:
+            sample = pd.concat([sample, chunk])
+    sample = sample.sort_values("_key") if len(sample) else sample
+    return sample.drop(columns="_key", errors="ignore"), rows_read
+
+def _validate_until(frames: Iterator[pd.DataFrame],
+                    max_failures: Optional[int]) -> Tuple[pd.DataFrame, bool]:
+    """Validate frames in order, stopping right after the Kth failure.
+
+    Returns:
+        Tuple of (validated rows with the evaluate_frame columns, stopped early)
+    """
+    validated: List[pd.DataFrame] = []
+    failures = 0
+    for frame in frames:
+        frame = frame.join(evaluate_frame(frame))
+        if max_failures is not None:
+            failed = (frame["Estado"] != "ok").to_numpy()
+            if failures + failed.sum() >= max_failures:
+                stop = np.flatnonzero(failed)[max_failures - failures - 1]
+                validated.append(frame.iloc[:stop + 1])
+                return pd.concat(validated), True
+            failures += failed.sum()
+        validated.append(frame)
+    return (pd.concat(validated) if validated else pd.DataFrame(columns=COLUMNS + RESULT_COLUMNS),
+            False)
+
+def _blocks(df: pd.DataFrame, size: int) -> Iterator[pd.DataFrame]:
+    for start in range(0, len(df), size):
+        yield df.iloc[start:start + size]
+
+def quick_audit(input_file: str, sample: Optional[int] = None,
+                max_failures: Optional[int] = None, seed: Optional[int] = None,
+                confidence: float = 0.95, chunksize: int = CHUNK_SIZE) -> Dict[str, Any]:
+    """Estimate failure rates of a UoM file without validating every row.
+
+    With `sample`, the file is streamed once to draw a uniform random sample
+    of that many rows, which is then validated. With `max_failures`,
+    validation stops right after that many failures; without a sample this
+    reads only as much of the file as needed, so the estimates describe the
+    start of the file rather than all of it.
+
+    Args:
+        input_file: Path to input CSV file
+        sample: Number of rows to sample
+        max_failures: Stop after this many failures
+        seed: Seed of the random sample
+        confidence: Confidence level of the intervals
+        chunksize: Rows read from the file at a time
+
+    Returns:
+        Report with overall, per-category and per-reason failure estimates
+    """
+    if (sample is not None and sample < 1) or (max_failures is not None and max_failures < 1):
+        raise ValueError("sample y max_failures deben ser al menos 1")
+    start = time.perf_counter()
+    chunks = pd.read_csv(input_file, usecols=COLUMNS, dtype=TEXT_DTYPES, chunksize=chunksize)
+    if sample is not None:
+        rows, rows_read = _reservoir(chunks, sample, np.random.default_rng(seed))
+        block = VALIDATION_BLOCK if max_failures is not None else max(len(rows), 1)
+        validated, stopped = _validate_until(_blocks(rows, block), max_failures)
+    else:
+        if max_failures is not None:
+            chunks = (block for chunk in chunks for block in _blocks(chunk, VALIDATION_BLOCK))
+        validated, stopped = _validate_until(chunks, max_failures)
+        rows_read = None if stopped else len(validated)
+
+    reasons = validated["Estado"].astype(object)
+    failed = reasons != "ok"
+    total = len(validated)
+    by_category = {
+        str(category): _estimate(int(group.sum()), len(group), confidence)
+        for category, group in failed.groupby(validated["Tipo de categoría de medida"])
+    }
+    by_reason = {
+        reason: _estimate(count, total, confidence)
+        for reason, count in Counter(reasons[failed]).most_common()
+    }
+    return {
+        "file": input_file,
+        "rows_read": rows_read,
+        "rows_validated": total,
+        "sample": sample,
+        "max_failures": max_failures,
+        "stopped_early": stopped,
+        "confidence": confidence,
+        "failure_rate": _estimate(int(failed.sum()), total, confidence),
+        "by_category": by_category,
+        "by_reason": by_reason,
+        "seconds": time.perf_counter() - start,
+    }
+
+def format_audit(report: Dict[str, Any]) -> str:
+    """Render an audit report as text for the console."""
+    def line(label: str, estimate: Dict[str, Any]) -> str:
+        return (f"  {label:<24} {estimate['rate']:7.2%}  "
+                f"[{estimate['low']:.2%} - {estimate['high']:.2%}]  "
+                f"({estimate['failures']}/{estimate['rows']})")
+
+    read = f" de {report['rows_read']} leídas" if report["rows_read"] is not None else ""
+    lines = [
+        f"Auditoría rápida de '{report['file']}': {report['rows_validated']} filas "
+        f"validadas{read} en {report['seconds']:.2f} s",
+    ]
+    if report["stopped_early"]:
+        lines.append(f"Detenido tras {report['max_failures']} fallos")
+    lines.append(f"Tasa de fallos estimada (IC {report['confidence']:.0%}):")
+    lines.append(line("Total", report["failure_rate"]))
+    lines.append("Por categoría:")
+    lines.extend(line(category, estimate) for category, estimate in report["by_category"].items())
+    lines.append("Por motivo:")
+    lines.extend(line(reason, estimate) for reason, estimate in report["by_reason"].items())
+    return "\n".join(lines)
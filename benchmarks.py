@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for the UoM validation system.
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, List
+
+import numpy as np
+import pandas as pd
+
+from units import CONVERSION_UNITS, convert, get_unit_info
+
+# Ways of producing the corrections file compared by the memory benchmark
+MEMORY_MODES = {
+    "read": "solo lectura del CSV",
+    "strings": "un str por fila en Correcciones",
+    "compact": "códigos categóricos + columnas numéricas",
+}
+
+def _time(label: str, func: Callable[[], object], count: int) -> None:
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<36} {elapsed:8.3f} s ({count / elapsed:,.0f} valores/s)")
+
+def bench_convert(size: int, seed: int) -> None:
+    """Benchmark `convert` on arrays of `size` values."""
+    rng = np.random.default_rng(seed)
+    values = rng.uniform(0, 1000, size)
+    series = pd.Series(values)
+    volume: List[str] = [unit.name for unit in CONVERSION_UNITS if unit.category == "volume"]
+    from_units = rng.choice(volume, size)
+    from_categorical = pd.Series(from_units, dtype="category")
+
+    print(f"convert ({size:,} valores)")
+    _time("ndarray, ml -> Fl Oz", lambda: convert(values, "ml", "Fl Oz"), size)
+    _time("Series, kg -> Oz", lambda: convert(series, "kg", "Oz"), size)
+    _time("ndarray, unidad por valor -> litros", lambda: convert(values, from_units, "litros"), size)
+    _time("Series, unidad categórica -> litros",
+          lambda: convert(series, from_categorical, "litros"), size)
+
+    # Baseline: one factor lookup per value, as a row-wise apply would do.
+    sample = min(size, 1_000_000)
+    def baseline() -> None:
+        factor = get_unit_info("fl oz")[0]
+        [v * get_unit_info("ml")[0] / factor for v in values[:sample]]
+    _time(f"bucle Python ({sample:,} valores)", baseline, sample)
+
+def _peak_rss_mb() -> float:
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+
+def memory_run(mode: str, input_file: str, output_file: str) -> None:
+    """Produce the corrections file one way and print peak RSS as JSON.
+
+    Every mode imports the same modules, so the peaks differ only by the
+    work done.
+    """
+    from check_uom import validate_file
+    from validators import validate_uom
+
+    start = time.perf_counter()
+    if mode == "compact":
+        validate_file(input_file, output_file)
+    else:
+        df = pd.read_csv(input_file)
+        if mode == "strings":
+            df["Correcciones"] = df.apply(validate_uom, axis=1)
+            df.to_csv(output_file, index=False)
+    print(json.dumps({"mode": mode, "seconds": time.perf_counter() - start,
+                      "peak_rss_mb": _peak_rss_mb()}))
+
+def bench_memory(rows: int, input_file: str, seed: int) -> None:
+    """Compare peak RSS of producing the corrections file for `rows` rows.
+
+    Each mode runs in its own process so peaks don't mix.
+    """
+    from differential import random_row
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if not input_file:
+            rng = random.Random(seed)
+            pool = pd.DataFrame([random_row(rng, 0.2) for _ in range(10_000)])
+            input_file = os.path.join(tmp, "uom.csv")
+            pool.sample(rows, replace=True, random_state=seed).to_csv(input_file, index=False)
+        print(f"memoria ({input_file})")
+
+        results = {}
+        for mode, label in MEMORY_MODES.items():
+            output = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "memory-run", mode,
+                 input_file, os.path.join(tmp, "out.csv")],
+                check=True, capture_output=True, text=True,
+            ).stdout
+            results[mode] = json.loads(output.splitlines()[-1])
+            print(f"  {mode:<8} {results[mode]['peak_rss_mb']:10.1f} MB pico "
+                  f"{results[mode]['seconds']:8.1f} s  ({label})")
+
+    base = results["read"]["peak_rss_mb"]
+    strings = results["strings"]["peak_rss_mb"] - base
+    compact = results["compact"]["peak_rss_mb"] - base
+    if strings > 0:
+        change = 1 - compact / strings
+        print(f"  Memoria por encima de la lectura: {strings:.1f} MB -> {compact:.1f} MB "
+              f"({abs(change):.0%} {'menos' if change >= 0 else 'más'})")
+
+def main() -> None:
+    """Main entry point for the benchmarks."""
+    parser = argparse.ArgumentParser(description="Benchmarks de validación de UoM")
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+    convert_parser = subparsers.add_parser("convert", help="Conversión vectorizada de unidades")
+    convert_parser.add_argument("-n", "--size", type=int, default=10_000_000,
+                                help="Número de valores a convertir")
+    convert_parser.add_argument("--seed", type=int, default=0, help="Semilla aleatoria")
+    memory_parser = subparsers.add_parser("memory",
+                                          help="Memoria pico al escribir Correcciones")
+    memory_parser.add_argument("-n", "--rows", type=int, default=5_000_000,
+                               help="Filas del archivo sintético")
+    memory_parser.add_argument("-f", "--file", help="Archivo CSV a usar en lugar del sintético")
+    memory_parser.add_argument("--seed", type=int, default=0, help="Semilla aleatoria")
+    run_parser = subparsers.add_parser("memory-run", help="Uso interno de 'memory'")
+    run_parser.add_argument("mode", choices=list(MEMORY_MODES))
+    run_parser.add_argument("input_file")
+    run_parser.add_argument("output_file")
+    args = parser.parse_args()
+
+    if args.benchmark == "convert":
+        bench_convert(args.size, args.seed)
+    elif args.benchmark == "memory":
+        bench_memory(args.rows, args.file, args.seed)
+    elif args.benchmark == "memory-run":
+        memory_run(args.mode, args.input_file, args.output_file)
+
+if __name__ == "__main__":
+    main()
@@ -7,28 +7,265 @@ It checks for correct ratios, categories, and naming conventions.
 """
 
 import argparse
+import glob
+import json
+import os
 import sys
-from typing import Optional
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
 
 import pandas as pd
 
-from validators import validate_name_only, validate_uom
+from audit import format_audit, quick_audit
+from explain import explain_file, explain_name
+from metrics import RunMetrics, cache_stats
+from odoo_source import SQLSource, XMLRPCSource, process_source
+from validators import TEXT_DTYPES, evaluate_frame, failure_counts, render_frame, validate_name_only
+from watch import UoMWatcher
 
-def process_file(input_file: str) -> None:
+DEFAULT_OUTPUT = "Correcciones_UoM.csv"
+OUTPUT_PREFIX = "Correcciones_"
+
+def expand_inputs(paths: List[str]) -> List[str]:
+    """Expand paths, glob patterns and directories into CSV files.
+
+    Files passed explicitly are kept as-is. Files found through a glob or a
+    directory are skipped if they are previous outputs of this script.
+
+    Args:
+        paths: Paths, glob patterns or directories
+
+    Returns:
+        Sorted list of unique file paths
+    """
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            matches = glob.glob(os.path.join(path, "*.csv"))
+        elif glob.has_magic(path):
+            matches = glob.glob(path)
+        else:
+            files.append(path)
+            continue
+        files.extend(
+            m for m in matches
+            if os.path.isfile(m) and not os.path.basename(m).startswith(OUTPUT_PREFIX)
+        )
+    return sorted(set(files))
+
+def output_path(input_file: str) -> str:
+    """Get the output path for an input file in multi-file runs.
+
+    Args:
+        input_file: Path to input CSV file
+
+    Returns:
+        Path of the corrections file, next to the input file
+    """
+    directory, filename = os.path.split(input_file)
+    return os.path.join(directory, OUTPUT_PREFIX + filename)
+
+def write_results(df: pd.DataFrame, results: pd.DataFrame, output_file: str,
+                  chunksize: int = 5_000) -> None:
+    """Write a CSV file with the input columns plus the "Correcciones" messages.
+
+    Messages are rendered one chunk at a time while writing, so only a
+    chunk's worth of strings exists at once.
+
+    Args:
+        df: DataFrame with the CSV columns
+        results: Compact results from evaluate_frame, aligned with df
+        output_file: Path to output CSV file
+        chunksize: Rows rendered and written at a time
+    """
+    with open(output_file, "w", encoding="utf-8", newline="") as f:
+        for start in range(0, max(len(df), 1), chunksize):
+            chunk = df.iloc[start:start + chunksize]
+            messages = render_frame(chunk, results.iloc[start:start + chunksize])
+            chunk.assign(Correcciones=messages).to_csv(f, header=start == 0, index=False)
+
+def validate_file(input_file: str, output_file: str) -> Dict[str, Any]:
+    """Validate a CSV file and write the corrections file.
+
+    Args:
+        input_file: Path to input CSV file
+        output_file: Path to output CSV file
+
+    Returns:
+        Summary with row counts, failures by reason and seconds per stage
+    """
+    timings = {}
+    start = time.perf_counter()
+    df = pd.read_csv(input_file, dtype=TEXT_DTYPES)
+    timings["read"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    results = evaluate_frame(df)
+    timings["validate"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    write_results(df, results, output_file)
+    timings["write"] = time.perf_counter() - start
+
+    failures = failure_counts(results)
+    return {
+        "file": input_file,
+        "output": output_file,
+        "rows": len(df),
+        "ok": len(df) - sum(failures.values()),
+        "revisar": sum(failures.values()),
+        "failures": failures,
+        "timings": timings,
+        "seconds": sum(timings.values()),
+    }
+
+def process_file(input_file: str, log_file: Optional[str] = None,
+                 metrics_file: Optional[str] = None, sample: Optional[int] = None,
+                 max_failures: Optional[int] = None, seed: Optional[int] = None) -> None:
     """Process a CSV file containing UoM definitions.
-    
+
+    With `sample` or `max_failures` the file is only audited: failure rates
+    are estimated and printed, and no corrections file is written.
+
     Args:
         input_file: Path to input CSV file
+        log_file: Path of a JSON-lines run log to append to
+        metrics_file: Path of a Prometheus textfile to write
+        sample: Number of rows to validate from a random sample
+        max_failures: Stop after this many failures
+        seed: Seed of the random sample
     """
+    metrics = RunMetrics(log_file)
+    if sample is not None or max_failures is not None:
+        try:
+            report = quick_audit(input_file, sample, max_failures, seed)
+        except Exception as e:
+            metrics.log("error", file=input_file, error=f"{type(e).__name__}: {e}")
+            print(f"Error procesando archivo: {e}")
+            sys.exit(1)
+        metrics.log("audit", **report)
+        print(format_audit(report))
+        return
     try:
-        df = pd.read_csv(input_file)
-        df["Correcciones"] = df.apply(validate_uom, axis=1)
-        df.to_csv("Correcciones_UoM.csv", index=False)
-        print("Archivo procesado. Resultados guardados en 'Correcciones_UoM.csv'")
+        metrics.add_file(validate_file(input_file, DEFAULT_OUTPUT))
+        print(f"Archivo procesado. Resultados guardados en '{DEFAULT_OUTPUT}'")
     except Exception as e:
+        metrics.add_error(input_file, e)
         print(f"Error procesando archivo: {e}")
+    summary = metrics.finish(metrics_file)
+    if summary["file_errors"]:
+        sys.exit(1)
+
+def _validate_in_worker(input_file: str, output_file: str) -> Dict[str, Any]:
+    """Run validate_file in a worker process, adding the cache lookups it made."""
+    before = cache_stats()
+    summary = validate_file(input_file, output_file)
+    after = cache_stats()
+    summary["cache"] = {
+        name: {key: after[name][key] - before[name][key] for key in ("hits", "misses")}
+        for name in after
+    }
+    return summary
+
+def process_files(input_files: List[str], workers: Optional[int] = None,
+                  log_file: Optional[str] = None,
+                  metrics_file: Optional[str] = None) -> None:
+    """Process several CSV files with a bounded pool of worker processes.
+
+    Validation is pure Python and holds the GIL, so files are validated in
+    parallel by separate processes. Each worker keeps its own unit and
+    parse caches across the files it validates; with a single worker the
+    files are validated in this process. Each file gets its own
+    corrections file.
+
+    Args:
+        input_files: Paths to input CSV files
+        workers: Maximum number of files processed at once
+        log_file: Path of a JSON-lines run log to append to
+        metrics_file: Path of a Prometheus textfile to write
+    """
+    if workers is None:
+        workers = min(4, os.cpu_count() or 1)
+
+    workers = min(workers, len(input_files))
+    if workers > 1:
+        executor, task = ProcessPoolExecutor(max_workers=workers), _validate_in_worker
+    else:
+        executor, task = ThreadPoolExecutor(max_workers=1), validate_file
+
+    metrics = RunMetrics(log_file)
+    with executor:
+        futures = {executor.submit(task, path, output_path(path)): path for path in input_files}
+        for future, path in futures.items():
+            try:
+                summary = future.result()
+            except Exception as e:
+                metrics.add_error(path, e)
+                print(f"Error procesando archivo '{path}': {e}")
+                continue
+            metrics.add_file(summary)
+            print(f"{path}: {summary['rows']} filas, {summary['ok']} OK, "
+                  f"{summary['revisar']} a revisar ({summary['seconds']:.2f} s). "
+                  f"Resultados en '{summary['output']}'")
+
+    summary = metrics.finish(metrics_file)
+    print(f"Total: {summary['files']} archivos, {summary['rows']} filas, {summary['ok']} OK, "
+          f"{summary['rows'] - summary['ok']} a revisar en {summary['seconds']:.2f} s "
+          f"({summary['rows_per_second']:.0f} filas/s)")
+    if summary["file_errors"]:
+        print(f"{summary['file_errors']} archivos con errores")
         sys.exit(1)
 
+def process_odoo(source: Any, write_back: bool = False, log_file: Optional[str] = None,
+                 metrics_file: Optional[str] = None) -> None:
+    """Validate UoM records read straight from Odoo.
+
+    Args:
+        source: XMLRPCSource or SQLSource
+        write_back: Write ratio fixes back to Odoo
+        log_file: Path of a JSON-lines run log to append to
+        metrics_file: Path of a Prometheus textfile to write
+    """
+    metrics = RunMetrics(log_file)
+    try:
+        summary = process_source(source, DEFAULT_OUTPUT, write_back)
+    except Exception as e:
+        metrics.add_error(str(source), e)
+        metrics.finish(metrics_file)
+        print(f"Error leyendo de Odoo: {e}")
+        sys.exit(1)
+    metrics.add_file(summary)
+    metrics.finish(metrics_file)
+    print(f"{summary['rows']} registros leídos de {source}, {summary['ok']} OK, "
+          f"{summary['revisar']} a revisar en {summary['seconds']:.2f} s "
+          f"({summary['records_per_second']:.0f} registros/s). "
+          f"Resultados guardados en '{DEFAULT_OUTPUT}'")
+    if write_back:
+        print(f"{summary['fixed']} ratios corregidos en Odoo")
+
+def odoo_source(args: argparse.Namespace) -> Any:
+    """Build the Odoo source selected on the command line."""
+    if args.odoo_dsn:
+        try:
+            import psycopg2
+        except ImportError:
+            print("--odoo-dsn requiere psycopg2 (pip install psycopg2-binary)")
+            sys.exit(1)
+        return SQLSource(psycopg2.connect(args.odoo_dsn), args.page_size)
+    password = args.odoo_password or os.environ.get("ODOO_PASSWORD")
+    if not (args.odoo_db and args.odoo_user and password):
+        print("--odoo-url requiere --odoo-db, --odoo-user y --odoo-password (o ODOO_PASSWORD)")
+        sys.exit(1)
+    return XMLRPCSource(args.odoo_url, args.odoo_db, args.odoo_user, password, args.page_size)
+
+def positive_int(value: str) -> int:
+    """argparse type for options that must be at least 1."""
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"debe ser un entero mayor o igual a 1: {value}")
+    return number
+
 def main() -> None:
     """Main entry point for the script."""
     parser = argparse.ArgumentParser(
@@ -36,15 +273,70 @@ def main() -> None:
         formatter_class=argparse.RawDescriptionHelpFormatter
     )
     parser.add_argument("-n", "--name", help="Nombre de unidad de medida a validar")
-    parser.add_argument("-f", "--file", help="Archivo CSV con unidades de medida")
-    
+    parser.add_argument("-f", "--file", nargs="+",
+                        help="Archivos CSV, patrones glob o directorios con unidades de medida")
+    parser.add_argument("-w", "--workers", type=positive_int,
+                        help="Número máximo de procesos que validan archivos en paralelo")
+    parser.add_argument("--explain", action="store_true",
+                        help="Mostrar en JSON cómo se interpretó cada nombre")
+    parser.add_argument("--watch", action="store_true",
+                        help="Revalidar el archivo cada vez que cambie")
+    parser.add_argument("--interval", type=float, default=1.0,
+                        help="Segundos entre revisiones del archivo en modo --watch")
+    parser.add_argument("--sample", type=positive_int,
+                        help="Auditoría rápida: validar una muestra aleatoria de N filas")
+    parser.add_argument("--max-failures", type=positive_int,
+                        help="Auditoría rápida: detenerse tras K fallos")
+    parser.add_argument("--seed", type=int, help="Semilla de la muestra aleatoria")
+    parser.add_argument("--odoo-url", help="URL de Odoo para leer las unidades por XML-RPC")
+    parser.add_argument("--odoo-db", help="Base de datos de Odoo")
+    parser.add_argument("--odoo-user", help="Usuario de Odoo")
+    parser.add_argument("--odoo-password",
+                        help="Contraseña o clave API de Odoo (por defecto ODOO_PASSWORD)")
+    parser.add_argument("--odoo-dsn",
+                        help="DSN de PostgreSQL para leer las unidades directamente de la base de datos")
+    parser.add_argument("--page-size", type=positive_int, default=5000,
+                        help="Registros leídos de Odoo por página")
+    parser.add_argument("--write-fixes", action="store_true",
+                        help="Escribir en Odoo los ratios corregidos")
+    parser.add_argument("--log-file",
+                        help="Archivo JSON-lines donde registrar la ejecución")
+    parser.add_argument("--metrics-file",
+                        help="Archivo .prom con métricas para el textfile collector de Prometheus")
+
     args = parser.parse_args()
-    
-    if args.name:
+
+    if args.name and args.explain:
+        print(json.dumps(explain_name(args.name), ensure_ascii=False, indent=2))
+    elif args.name:
         result = validate_name_only(args.name)
         print(f"Validación de '{args.name}': {result}")
     elif args.file:
-        process_file(args.file)
+        input_files = expand_inputs(args.file)
+        if not input_files:
+            print("No se encontraron archivos CSV")
+            sys.exit(1)
+        if args.explain:
+            for input_file in input_files:
+                explain_file(input_file)
+        elif args.watch:
+            if len(input_files) != 1:
+                print("--watch requiere un único archivo")
+                sys.exit(1)
+            try:
+                UoMWatcher(input_files[0], DEFAULT_OUTPUT, args.interval).run()
+            except KeyboardInterrupt:
+                pass
+        elif args.sample is not None or args.max_failures is not None:
+            for input_file in input_files:
+                process_file(input_file, args.log_file, sample=args.sample,
+                             max_failures=args.max_failures, seed=args.seed)
+        elif len(args.file) == 1 and input_files == args.file:
+            process_file(input_files[0], args.log_file, args.metrics_file)
+        else:
+            process_files(input_files, args.workers, args.log_file, args.metrics_file)
+    elif args.odoo_url or args.odoo_dsn:
+        process_odoo(odoo_source(args), args.write_fixes, args.log_file, args.metrics_file)
     else:
         parser.print_help()
         sys.exit(1)
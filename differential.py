@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Differential harness between the legacy script and the modular validators.
+
+Generates random grammar-valid and invalid UoM names and rows, runs them
+through every engine (the legacy `check_uom-copy.py`, the modular code and
+its fast paths, including the DataFrame path used for files) and reports
+where they disagree with a reference engine, together with the throughput
+of each engine.
+"""
+import argparse
+import importlib.util
+import os
+import random
+import sys
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+import parsers
+import units
+import validators
+from units import ALL_UNITS, PACKAGE_TYPES, PACKAGE_WORDS
+
+TIPOS = [
+    "Más grande que la unidad de medida de referencia",
+    "Más pequeña que la unidad de medida de referencia",
+    "Unidad de medida de referencia para esta categoría",
+]
+CATEGORIES = ["volume", "weight", "length", "unit"]
+NOISE_WORDS = ["de", "/", "x", "aprox", "grande", "Mixto", "12x", "de de", "  "]
+
+def load_legacy():
+    """Load `check_uom-copy.py`, whose file name is not importable."""
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "check_uom-copy.py")
+    spec = importlib.util.spec_from_file_location("check_uom_legacy", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def _quantity(rng: random.Random) -> str:
+    qty = rng.choice([rng.randint(1, 1000), round(rng.uniform(0.1, 100), rng.randint(1, 3))])
+    return str(qty)
+
+def _unit(rng: random.Random) -> Tuple[str, Any]:
+    unit = rng.choice(ALL_UNITS)
+    return rng.choice(unit.patterns + [unit.name]), unit
+
+def random_name(rng: random.Random) -> Tuple[str, float, str]:
+    """Generate a UoM name following the naming guide.
+
+    Returns:
+        Tuple of (name, total_in_reference, category)
+    """
+    shape = rng.randrange(4)
+    surface, unit = _unit(rng)
+    qty = _quantity(rng)
+    total = float(qty) * unit.conversion_factor
+    if shape == 0:
+        return f"{rng.choice(PACKAGE_TYPES)} {qty} {surface}", total, unit.category
+    if shape == 1:
+        return f"{rng.choice(PACKAGE_TYPES)} {qty}", float(qty), "unit"
+    if shape == 2:
+        outer = _quantity(rng)
+        if rng.random() < 0.5:
+            outer_part = f"{rng.choice(PACKAGE_TYPES)} {outer}"
+        else:
+            outer_part = f"{outer} {rng.choice(PACKAGE_WORDS)}"
+        inner_part = f"{rng.choice(PACKAGE_TYPES)} {qty} {surface}"
+        return f"{outer_part} / {inner_part}", total * float(outer), unit.category
+    return f"{qty} {surface}", total, unit.category
+
+def mutate_name(rng: random.Random, name: str) -> str:
+    """Break a valid name by dropping, swapping or inserting tokens."""
+    tokens = name.split(" ")
+    op = rng.randrange(4)
+    if op == 0 and len(tokens) > 1:
+        del tokens[rng.randrange(len(tokens))]
+    elif op == 1 and len(tokens) > 1:
+        i, j = rng.randrange(len(tokens)), rng.randrange(len(tokens))
+        tokens[i], tokens[j] = tokens[j], tokens[i]
+    elif op == 2:
+        tokens.insert(rng.randrange(len(tokens) + 1), rng.choice(NOISE_WORDS))
+    else:
+        return name.upper() if rng.random() < 0.5 else name.replace(" ", "")
+    return " ".join(tokens)
+
+def random_row(rng: random.Random, invalid_rate: float) -> Dict[str, Any]:
+    """Generate a CSV row, with correct or perturbed ratios and category."""
+    name, total, category = random_name(rng)
+    if rng.random() < invalid_rate:
+        name = mutate_name(rng, name)
+    tipo = rng.choice(TIPOS)
+    if tipo == TIPOS[2]:
+        mayor_ratio = ratio = 1.0
+    else:
+        mayor_ratio = total
+        ratio = 1 / total if total else 0.0
+    if rng.random() < invalid_rate:
+        mayor_ratio *= rng.choice([0.5, 2, 10])
+        ratio *= rng.choice([0.5, 2, 10])
+    if rng.random() < invalid_rate:
+        category = rng.choice(CATEGORIES)
+    return {
+        "Unidad de medida": name,
+        "Tipo": tipo,
+        "Mayor ratio": mayor_ratio,
+        "Ratio": ratio,
+        "Tipo de categoría de medida": category,
+    }
+
+def status(message: str) -> str:
+    """Reduce a validation message to its status word."""
+    return "OK" if message == "OK" else message.split(":")[0]
+
+def batch(func: Callable[[List[Any]], List[Any]]) -> Callable:
+    """Mark an engine that takes the whole list of inputs at once."""
+    func.batch = True
+    return func
+
+def build_checks(legacy, compare: str) -> Dict[str, Dict[str, Callable]]:
+    """Map each checked function to its engines, keyed by engine name."""
+    key = status if compare == "status" else (lambda message: message)
+    return {
+        "get_unit_info": {
+            "legacy": legacy.get_unit_info,
+            "modular": units.get_unit_info.__wrapped__,
+            "cached": units.get_unit_info,
+        },
+        "get_base_category": {
+            "legacy": legacy.get_base_category,
+            "modular": units.get_base_category.__wrapped__,
+            "cached": units.get_base_category,
+        },
+        "validate_name_only": {
+            "legacy": lambda name: key(legacy.validate_name_only(name)),
+            "modular": lambda name: key(validators.validate_name_only(name)),
+        },
+        "validate_uom": {
+            "legacy": lambda row: key(legacy.validate_uom(row)),
+            "modular": lambda row: key(validators.validate_uom(row)),
+            # The production path: compact results rendered for a whole frame
+            "frame": batch(lambda rows: [key(message) for message in validators.validate_frame(
+                pd.DataFrame(rows, columns=validators.COLUMNS))]),
+        },
+    }
+
+def clear_caches() -> None:
+    """Empty the modular caches so every engine is timed from cold."""
+    for func in (units.get_unit_info, units.get_base_category,
+                 parsers.parse_compound_package, parsers.parse_simple_package):
+        func.cache_clear()
+
+def _call(func: Callable, arg: Any) -> Any:
+    try:
+        return func(arg)
+    except Exception as e:
+        return f"<{type(e).__name__}>"
+
+def run(count: int, seed: int, invalid_rate: float, reference: str,
+        compare: str, examples: int, engines: Optional[List[str]] = None) -> int:
+    """Run every engine on generated inputs and print a report.
+
+    The legacy script differs from the modular code by design, so its
+    disagreements are reported but only counted when it is the reference.
+
+    Args:
+        engines: Engines to run; all of them by default. Checks left with
+            fewer than two engines are skipped.
+
+    Returns:
+        Number of disagreements with the reference engine
+    """
+    rng = random.Random(seed)
+    rows = [random_row(rng, invalid_rate) for _ in range(count)]
+    names = [row["Unidad de medida"] for row in rows]
+    inputs = {
+        "get_unit_info": names,
+        "get_base_category": names,
+        "validate_name_only": names,
+        "validate_uom": rows,
+    }
+
+    total_disagreements = 0
+    for check, check_engines in build_checks(load_legacy(), compare).items():
+        if engines:
+            check_engines = {name: func for name, func in check_engines.items()
+                             if name in engines}
+        if len(check_engines) < 2:
+            continue
+        items = inputs[check]
+        outputs: Dict[str, List[Any]] = {}
+        print(f"{check} ({len(items)} entradas)")
+        for engine, func in check_engines.items():
+            clear_caches()
+            start = time.perf_counter()
+            if getattr(func, "batch", False):
+                outputs[engine] = _call(func, items)
+                if not isinstance(outputs[engine], list):
+                    outputs[engine] = [outputs[engine]] * len(items)
+            else:
+                outputs[engine] = [_call(func, item) for item in items]
+            elapsed = time.perf_counter() - start
+            rate = len(items) / elapsed if elapsed > 0 else 0.0
+            print(f"  {engine:>8}: {elapsed:8.2f} s ({rate:,.0f}/s)")
+
+        ref = reference if reference in outputs else next(iter(outputs))
+        for engine, results in outputs.items():
+            if engine == ref:
+                continue
+            diffs = [i for i, (a, b) in enumerate(zip(outputs[ref], results)) if a != b]
+            counted = engine != "legacy" or ref == "legacy"
+            if counted:
+                total_disagreements += len(diffs)
+            print(f"  {engine} vs {ref}: {len(diffs)} diferencias"
+                  + ("" if counted else " (no cuentan para el código de salida)"))
+            # Group by message prefix so numbers don't split one kind into many.
+            kinds: Counter = Counter()
+            first: Dict[Tuple[str, str], int] = {}
+            for i in diffs:
+                kind = (str(outputs[ref][i])[:40], str(results[i])[:40])
+                kinds[kind] += 1
+                first.setdefault(kind, i)
+            for kind, n in kinds.most_common(examples):
+                i = first[kind]
+                print(f"    {n:>8} x  {names[i]!r}\n"
+                      f"               {ref}: {outputs[ref][i]!r}\n"
+                      f"               {engine}: {results[i]!r}")
+    return total_disagreements
+
+def main() -> None:
+    """Main entry point for the harness."""
+    parser = argparse.ArgumentParser(
+        description="Comparar el script original con los validadores modulares"
+    )
+    parser.add_argument("-n", "--count", type=int, default=100_000,
+                        help="Número de nombres y filas generados")
+    parser.add_argument("--seed", type=int, default=0, help="Semilla aleatoria")
+    parser.add_argument("--invalid-rate", type=float, default=0.2,
+                        help="Probabilidad de alterar nombre, ratios o categoría")
+    parser.add_argument("--reference", default="legacy",
+                        help="Motor contra el que se comparan los demás")
+    parser.add_argument("--engines", type=lambda value: value.split(","),
+                        help="Motores a ejecutar, separados por comas "
+                             "(legacy, modular, cached, frame; por defecto todos)")
+    parser.add_argument("--compare", choices=["message", "status"], default="message",
+                        help="Comparar el mensaje completo o solo el estado")
+    parser.add_argument("--examples", type=int, default=5,
+                        help="Ejemplos mostrados por tipo de diferencia")
+    args = parser.parse_args()
+
+    disagreements = run(args.count, args.seed, args.invalid_rate, args.reference,
+                        args.compare, args.examples, args.engines)
+    sys.exit(1 if disagreements else 0)
+
+if __name__ == "__main__":
+    main()
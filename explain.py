@@ -0,0 +1,148 @@
+"""
+Explain mode: trace how a UoM name is parsed and validated.
+
+The trace is built from the same matchers the validators use, but only when
+an explanation is requested; normal validation never runs this code.
+"""
+import json
+import math
+import sys
+from typing import Any, Dict, Optional, TextIO
+
+import pandas as pd
+
+from parsers import match_compound_package, match_simple_package
+from units import PACKAGE_TYPES, get_reference_unit, match_category, match_unit
+from validators import TEXT_DTYPES, validate_name_only, validate_uom
+
+def _json_value(value: Any) -> Any:
+    """Empty cells are NaN for the validators but null in the JSON trace."""
+    return None if isinstance(value, float) and math.isnan(value) else value
+
+def _unit_trace(unit_text: str) -> Dict[str, Any]:
+    match = match_unit(unit_text)
+    if not match:
+        return {"text": unit_text, "name": "", "pattern": None, "priority": None, "factor": 1.0}
+    unit, pattern, priority = match
+    return {
+        "text": unit_text,
+        "name": unit.name,
+        "pattern": pattern,
+        "priority": priority,
+        "factor": unit.conversion_factor,
+    }
+
+def _ratios(total_qty: float, unit: Dict[str, Any], category: str) -> Dict[str, Any]:
+    total_in_reference = total_qty * unit["factor"]
+    return {
+        "total_qty": total_qty,
+        "total_in_reference": total_in_reference,
+        "reference_unit": get_reference_unit(category),
+        "expected_mayor_ratio": total_in_reference,
+        "expected_ratio": 1 / total_in_reference if total_in_reference != 0 else 0,
+    }
+
+def _package_kind(token: Optional[str]) -> Optional[str]:
+    if token is None:
+        return None
+    return "type" if token in PACKAGE_TYPES else "word"
+
+def _trace(name: str, category: Optional[str], simple_only: bool) -> Dict[str, Any]:
+    """Trace the package shape, quantities, unit and ratios of a name.
+
+    `simple_only` follows `validate_uom`, which parses every name without
+    "/" as a simple package; otherwise `validate_name_only` is followed.
+    """
+    trace: Dict[str, Any] = {}
+    qty = None
+    if "/" in name:
+        outer_qty, inner_qty, outer_part, inner_part, token = match_compound_package(name)
+        trace["shape"] = "compound"
+        trace["package"] = {"token": token, "kind": _package_kind(token),
+                            "outer_part": outer_part, "inner_part": inner_part}
+        trace["quantities"] = {"outer": outer_qty, "inner": inner_qty}
+        if outer_qty and inner_qty:
+            trace["unit"] = _unit_trace(inner_part)
+            trace["ratios"] = _ratios(outer_qty * inner_qty, trace["unit"], category)
+        return trace
+    if simple_only or any(pkg in name for pkg in PACKAGE_TYPES):
+        qty, rest_of_name, token = match_simple_package(name)
+        trace["shape"] = "simple"
+        trace["package"] = {"token": token, "kind": _package_kind(token), "rest": rest_of_name}
+    else:
+        trace["shape"] = "unit"
+        try:
+            qty = float(name.split()[0])
+        except (IndexError, ValueError):
+            pass
+    trace["quantities"] = {"qty": qty}
+    # A bare unit only needs a number; a package needs a non-zero quantity.
+    found = qty is not None if trace["shape"] == "unit" else bool(qty)
+    if found:
+        trace["unit"] = _unit_trace(name)
+        trace["ratios"] = _ratios(qty, trace["unit"], category)
+    return trace
+
+def _category_trace(name: str) -> Dict[str, Any]:
+    match = match_category(name)
+    return {
+        "value": match[0].category if match else None,
+        "unit": match[0].name if match else None,
+        "pattern": match[1] if match else None,
+    }
+
+def explain_name(name: str) -> Dict[str, Any]:
+    """Trace how a UoM name is parsed, following `validate_name_only`.
+
+    Args:
+        name: Name to explain
+
+    Returns:
+        Trace with the category match, the package shape and token, the
+        extracted quantities, the unit pattern hit and its priority, the
+        ratio computation and the validation result
+    """
+    trace: Dict[str, Any] = {"name": name, "category": _category_trace(name)}
+    if trace["category"]["value"]:
+        trace.update(_trace(name, trace["category"]["value"], simple_only=False))
+    trace["result"] = validate_name_only(name)
+    return trace
+
+def explain_row(row: Dict[str, Any]) -> Dict[str, Any]:
+    """Trace how a CSV row is parsed, following `validate_uom`.
+
+    Args:
+        row: CSV row data
+
+    Returns:
+        Trace of the row's name, the row values and the validation result
+    """
+    name = row["Unidad de medida"]
+    trace: Dict[str, Any] = {"name": _json_value(name), "category": _category_trace(name)}
+    trace["row"] = {
+        "tipo": _json_value(row["Tipo"]),
+        "mayor_ratio": _json_value(row["Mayor ratio"]),
+        "ratio": _json_value(row["Ratio"]),
+        "categoria": _json_value(row["Tipo de categoría de medida"]),
+    }
+    category = trace["category"]["value"] or row["Tipo de categoría de medida"]
+    trace.update(_trace(name, category, simple_only=True))
+    trace["result"] = validate_uom(row)
+    return trace
+
+def explain_file(input_file: str, out: TextIO = sys.stdout) -> None:
+    """Write the trace of every row of a CSV file as JSON lines.
+
+    Args:
+        input_file: Path to input CSV file
+        out: Stream the JSON lines are written to
+    """
+    # Rows keep NaN for empty cells, exactly as the validators see them.
+    df = pd.read_csv(input_file, dtype=TEXT_DTYPES)
+    for row in df.to_dict("records"):
+        try:
+            trace = explain_row(row)
+        except Exception as e:
+            trace = {"name": _json_value(row.get("Unidad de medida")),
+                     "error": f"{type(e).__name__}: {e}"}
+        out.write(json.dumps(trace, ensure_ascii=False, default=str) + "\n")
@@ -0,0 +1,157 @@
+"""
+Run metrics: JSON-lines run log and Prometheus textfile export.
+"""
+import json
+import os
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+import parsers
+import units
+
+# Caches whose hit rates are reported, by name.
+CACHES = {
+    "get_unit_info": units.get_unit_info,
+    "get_base_category": units.get_base_category,
+    "parse_compound_package": parsers.parse_compound_package,
+    "parse_simple_package": parsers.parse_simple_package,
+}
+
+def cache_stats(extra: Optional[Dict[str, Counter]] = None) -> Dict[str, Dict[str, Any]]:
+    """Get hit/miss counts and hit rate for each validation cache.
+
+    Args:
+        extra: Hits and misses made in other processes, added to this one's
+    """
+    extra = extra or {}
+    stats = {}
+    for name, func in CACHES.items():
+        info = func.cache_info()
+        hits = info.hits + extra.get(name, {}).get("hits", 0)
+        misses = info.misses + extra.get(name, {}).get("misses", 0)
+        lookups = hits + misses
+        stats[name] = {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / lookups if lookups else 0.0,
+        }
+    return stats
+
+class RunMetrics:
+    """Aggregate per-file summaries of a run and export them.
+
+    Summaries are the dicts returned by `check_uom.validate_file`. A
+    summary from a worker process carries the cache lookups it made under
+    "cache", which are added to this process's cache stats. Methods are
+    thread-safe so files can be reported as they finish.
+    """
+
+    def __init__(self, log_file: Optional[str] = None):
+        self.log_file = log_file
+        self.files = 0
+        self.file_errors = 0
+        self.rows = 0
+        self.ok = 0
+        self.failures: Counter = Counter()
+        self.timings: Counter = Counter()
+        self.cache: Dict[str, Counter] = defaultdict(Counter)
+        self._start = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def add_file(self, summary: Dict[str, Any]) -> None:
+        """Record a processed file and log it."""
+        with self._lock:
+            self.files += 1
+            self.rows += summary["rows"]
+            self.ok += summary["ok"]
+            self.failures.update(summary["failures"])
+            self.timings.update(summary["timings"])
+            for name, lookups in summary.get("cache", {}).items():
+                self.cache[name].update(lookups)
+            self.log("file", **summary)
+
+    def add_error(self, input_file: str, error: Exception) -> None:
+        """Record a file that could not be processed and log it."""
+        with self._lock:
+            self.file_errors += 1
+            self.log("error", file=input_file, error=f"{type(error).__name__}: {error}")
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self._start
+
+    def summary(self) -> Dict[str, Any]:
+        """Get the totals of the run."""
+        elapsed = self.elapsed
+        return {
+            "files": self.files,
+            "file_errors": self.file_errors,
+            "rows": self.rows,
+            "ok": self.ok,
+            "failures": dict(self.failures),
+            "timings": dict(self.timings),
+            "seconds": elapsed,
+            "rows_per_second": self.rows / elapsed if elapsed > 0 else 0.0,
+            "cache": cache_stats(self.cache),
+        }
+
+    def log(self, event: str, **fields: Any) -> None:
+        """Append one JSON line to the run log, if one is configured."""
+        if not self.log_file:
+            return
+        record = {"ts": datetime.now(timezone.utc).isoformat(), "event": event, **fields}
+        with open(self.log_file, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def finish(self, metrics_file: Optional[str] = None) -> Dict[str, Any]:
+        """Log the run totals and optionally write the Prometheus textfile.
+
+        Returns:
+            The run totals
+        """
+        summary = self.summary()
+        self.log("run", **summary)
+        if metrics_file:
+            write_prometheus(summary, metrics_file)
+        return summary
+
+def write_prometheus(summary: Dict[str, Any], metrics_file: str) -> None:
+    """Write run totals in Prometheus textfile format.
+
+    The file is written next to its final path and renamed into place, so
+    the node exporter textfile collector never reads a partial file.
+
+    Args:
+        summary: Run totals from RunMetrics.summary
+        metrics_file: Path of the .prom file
+    """
+    lines = []
+
+    def metric(name: str, help_text: str, samples: Dict[str, float], label: str = "") -> None:
+        lines.append(f"# HELP uom_check_{name} {help_text}")
+        lines.append(f"# TYPE uom_check_{name} gauge")
+        for key, value in samples.items():
+            labels = f'{{{label}="{key}"}}' if label else ""
+            lines.append(f"uom_check_{name}{labels} {value}")
+
+    metric("files", "Files processed in the last run.", {"": summary["files"]})
+    metric("file_errors", "Files that failed in the last run.", {"": summary["file_errors"]})
+    metric("rows", "Rows validated in the last run.", {"": summary["rows"]})
+    metric("rows_ok", "Rows without issues in the last run.", {"": summary["ok"]})
+    metric("row_failures", "Rows to review in the last run, by reason.",
+           summary["failures"], "reason")
+    metric("stage_seconds", "Seconds spent per stage in the last run.",
+           summary["timings"], "stage")
+    metric("duration_seconds", "Wall-clock duration of the last run.", {"": summary["seconds"]})
+    metric("rows_per_second", "Throughput of the last run.", {"": summary["rows_per_second"]})
+    metric("cache_hit_ratio", "Hit ratio of each validation cache.",
+           {name: stats["hit_rate"] for name, stats in summary["cache"].items()}, "cache")
+    metric("last_run_timestamp_seconds", "Unix time the last run finished.", {"": time.time()})
+
+    tmp_file = metrics_file + ".tmp"
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+    os.replace(tmp_file, metrics_file)
@@ -0,0 +1,320 @@
+"""
+Read UoM records straight from Odoo and write ratio fixes back.
+
+Two sources are available: `XMLRPCSource` talks to a running Odoo through
+its external API, and `SQLSource` reads the `uom_uom` table through any
+DB-API connection (psycopg2 for PostgreSQL, or sqlite3 for a local copy).
+Both yield pages of records as DataFrames with the CSV export columns.
+"""
+import json
+import sys
+import time
+import xmlrpc.client
+from collections import Counter, defaultdict
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import pandas as pd
+
+from units import CONVERSION_UNITS, UNIT_INDEX, get_base_category
+from validators import COLUMNS, evaluate_frame, failure_counts, render_frame
+
+PAGE_SIZE = 5000
+WRITE_BATCH_SIZE = 500
+
+# Odoo uom_type values -> "Tipo" column of the CSV export
+UOM_TYPES = {
+    "reference": "Unidad de medida de referencia para esta categoría",
+    "bigger": "Más grande que la unidad de medida de referencia",
+    "smaller": "Más pequeña que la unidad de medida de referencia",
+}
+
+# A fix is the record id and the values to write
+Fix = Tuple[int, Dict[str, float]]
+
+def category_code(reference_name: Optional[str]) -> Optional[str]:
+    """Get the category code (volume, weight, ...) from a category's reference UoM name."""
+    if not reference_name:
+        return None
+    index = UNIT_INDEX.get(reference_name.strip().lower())
+    if index is not None:
+        return CONVERSION_UNITS[index].category
+    return get_base_category(reference_name)
+
+def category_codes(categories: List[Tuple[int, str, Optional[str]]]) -> Dict[int, str]:
+    """Map category ids to the codes of the "Tipo de categoría de medida" column.
+
+    Odoo 13+ has no `measure_type` on categories, so the code is derived
+    from each category's reference UoM. Categories whose reference UoM is
+    not a known unit keep their name and are reported on stderr.
+
+    Args:
+        categories: Tuples of (category id, category name, reference UoM name)
+
+    Returns:
+        Category id -> category code
+    """
+    codes = {}
+    unknown = []
+    for category_id, name, reference_name in categories:
+        code = category_code(reference_name)
+        if code is None:
+            unknown.append(f"{name} ({reference_name or 'sin unidad de referencia'})")
+        codes[category_id] = code or name
+    if unknown:
+        print("Categorías sin tipo conocido, se validan con su nombre: " + ", ".join(unknown),
+              file=sys.stderr)
+    return codes
+
+def _frame(records: List[Dict[str, Any]]) -> pd.DataFrame:
+    """Build a page DataFrame from records with Odoo field names."""
+    df = pd.DataFrame.from_records(
+        records, columns=["id", "name", "uom_type", "factor_inv", "factor", "measure_type"]
+    )
+    df["uom_type"] = df["uom_type"].map(UOM_TYPES).fillna(df["uom_type"])
+    df.columns = ["id"] + COLUMNS
+    return df
+
+class XMLRPCSource:
+    """UoM records from Odoo's XML-RPC external API.
+
+    The XML-RPC proxies are created once and reused, so pages are fetched
+    over the same HTTP connection.
+    """
+
+    def __init__(self, url: str, db: str, username: str, password: str,
+                 page_size: int = PAGE_SIZE):
+        self.url = url.rstrip("/")
+        self.db = db
+        self.password = password
+        self.page_size = page_size
+        common = xmlrpc.client.ServerProxy(f"{self.url}/xmlrpc/2/common")
+        self.uid = common.authenticate(db, username, password, {})
+        if not self.uid:
+            raise ValueError(f"Autenticación fallida para '{username}' en '{db}'")
+        self._models = xmlrpc.client.ServerProxy(f"{self.url}/xmlrpc/2/object", allow_none=True)
+
+    def __str__(self) -> str:
+        return f"{self.url}/{self.db}"
+
+    def _execute(self, model: str, method: str, *args: Any, **kwargs: Any) -> Any:
+        return self._models.execute_kw(self.db, self.uid, self.password,
+                                       model, method, list(args), kwargs)
+
+    def _measure_types(self) -> Dict[int, str]:
+        """Map category ids to their measure type (Odoo 12) or derived category code."""
+        try:
+            categories = self._execute("uom.category", "search_read", [],
+                                       fields=["measure_type"])
+            return {c["id"]: c["measure_type"] for c in categories}
+        except xmlrpc.client.Fault:
+            pass
+        references = self._execute("uom.uom", "search_read", [("uom_type", "=", "reference")],
+                                   fields=["name", "category_id"])
+        reference_names = {r["category_id"][0]: r["name"] for r in references if r["category_id"]}
+        categories = self._execute("uom.category", "search_read", [], fields=["name"])
+        return category_codes([(c["id"], c["name"], reference_names.get(c["id"]))
+                               for c in categories])
+
+    def pages(self) -> Iterator[pd.DataFrame]:
+        """Fetch uom.uom records, one page per DataFrame."""
+        measure_types = self._measure_types()
+        offset = 0
+        while True:
+            records = self._execute(
+                "uom.uom", "search_read", [],
+                fields=["name", "uom_type", "factor_inv", "factor", "category_id"],
+                offset=offset, limit=self.page_size, order="id",
+            )
+            for record in records:
+                category = record.pop("category_id")
+                record["measure_type"] = measure_types.get(category[0]) if category else None
+            if records:
+                yield _frame(records)
+            if len(records) < self.page_size:
+                return
+            offset += len(records)
+
+    def write_fixes(self, fixes: List[Fix], batch_size: int = WRITE_BATCH_SIZE) -> None:
+        """Write fixes, one `write` call per batch of records sharing the same values."""
+        groups: Dict[str, List[int]] = defaultdict(list)
+        for record_id, values in fixes:
+            groups[json.dumps(values, sort_keys=True)].append(record_id)
+        for values, ids in groups.items():
+            for start in range(0, len(ids), batch_size):
+                self._execute("uom.uom", "write", ids[start:start + batch_size],
+                              json.loads(values))
+
+class SQLSource:
+    """UoM records read from Odoo's database through a DB-API connection.
+
+    Pages are fetched with keyset pagination on `id`, which stays fast on
+    large tables. `factor_inv` is not stored by Odoo and is computed here,
+    and so is the category code when `uom_category` has no `measure_type`.
+    """
+
+    def __init__(self, connection: Any, page_size: int = PAGE_SIZE,
+                 paramstyle: Optional[str] = None):
+        self.connection = connection
+        self.page_size = page_size
+        if paramstyle is None:
+            driver = sys.modules[type(connection).__module__.split(".")[0]]
+            paramstyle = driver.paramstyle
+        self._param = "?" if paramstyle == "qmark" else "%s"
+
+    def __str__(self) -> str:
+        return type(self.connection).__module__.split(".")[0]
+
+    @staticmethod
+    def _name(value: Any) -> Any:
+        """Odoo 16+ stores translatable names as JSON; take the first translation."""
+        if isinstance(value, str) and value.startswith("{"):
+            try:
+                translations = json.loads(value)
+                return translations.get("en_US", next(iter(translations.values())))
+            except (ValueError, StopIteration):
+                pass
+        elif isinstance(value, dict):
+            return value.get("en_US", next(iter(value.values()), None))
+        return value
+
+    def _measure_types(self) -> Dict[int, str]:
+        """Map category ids to their measure type (Odoo 12) or derived category code."""
+        cursor = self.connection.cursor()
+        try:
+            # measure_type was dropped in Odoo 13; look for it without a
+            # failing statement, which would abort the transaction.
+            cursor.execute("SELECT * FROM uom_category WHERE 1 = 0")
+            cursor.fetchall()
+            if "measure_type" in [column[0] for column in cursor.description]:
+                cursor.execute("SELECT id, measure_type FROM uom_category")
+                return dict(cursor.fetchall())
+            cursor.execute(
+                "SELECT c.id, c.name, u.name FROM uom_category c "
+                "LEFT JOIN uom_uom u ON u.category_id = c.id "
+                "AND u.uom_type = 'reference' AND u.active"
+            )
+            return category_codes([(category_id, self._name(name), self._name(reference))
+                                   for category_id, name, reference in cursor.fetchall()])
+        finally:
+            cursor.close()
+
+    def pages(self) -> Iterator[pd.DataFrame]:
+        """Fetch uom_uom rows, one page per DataFrame."""
+        measure_types = self._measure_types()
+        query = (
+            "SELECT id, name, uom_type, factor, category_id FROM uom_uom "
+            f"WHERE active AND id > {self._param} ORDER BY id LIMIT {self._param}"
+        )
+        cursor = self.connection.cursor()
+        last_id = 0
+        try:
+            while True:
+                cursor.execute(query, (last_id, self.page_size))
+                rows = cursor.fetchall()
+                if rows:
+                    yield _frame([{
+                        "id": record_id,
+                        "name": self._name(name),
+                        "uom_type": uom_type,
+                        "factor_inv": 1 / factor if factor else 0.0,
+                        "factor": factor,
+                        "measure_type": measure_types.get(category_id),
+                    } for record_id, name, uom_type, factor, category_id in rows])
+                    last_id = rows[-1][0]
+                if len(rows) < self.page_size:
+                    return
+        finally:
+            cursor.close()
+
+    def write_fixes(self, fixes: List[Fix], batch_size: int = WRITE_BATCH_SIZE) -> None:
+        """Write fixes with one `executemany` per batch, then commit."""
+        query = f"UPDATE uom_uom SET factor = {self._param} WHERE id = {self._param}"
+        cursor = self.connection.cursor()
+        try:
+            for start in range(0, len(fixes), batch_size):
+                batch = fixes[start:start + batch_size]
+                cursor.executemany(query, [(values["factor"], record_id)
+                                           for record_id, values in batch])
+            self.connection.commit()
+        finally:
+            cursor.close()
+
+def compute_fixes(df: pd.DataFrame, results: pd.DataFrame) -> List[Fix]:
+    """Get the factor to write for each record whose ratio is wrong.
+
+    Odoo stores `factor` = 1 / total in reference units for every UoM type;
+    `factor_inv` (Mayor ratio) is derived from it.
+
+    Args:
+        df: Page with an "id" column
+        results: Compact results from evaluate_frame, aligned with df
+
+    Returns:
+        List of (record id, values) fixes
+    """
+    totals = results["Total en referencia"]
+    wrong = results["Estado"].isin(["mayor_ratio", "ratio"]) & (totals != 0)
+    return [(int(record_id), {"factor": 1 / total})
+            for record_id, total in zip(df.loc[wrong, "id"], totals[wrong])]
+
+def process_source(source: Any, output_file: str, write_back: bool = False) -> Dict[str, Any]:
+    """Validate every record of a source, page by page.
+
+    Each page is validated as soon as it is fetched and appended to the
+    output CSV; with `write_back`, its fixes are written before the next page.
+
+    Args:
+        source: XMLRPCSource or SQLSource
+        output_file: Path to output CSV file
+        write_back: Write ratio fixes back to Odoo
+
+    Returns:
+        Summary with row counts, failures by reason, fixes written, seconds
+        per stage and records per second
+    """
+    timings: Counter = Counter()
+    failures: Counter = Counter()
+    rows = fixed = 0
+    start = time.perf_counter()
+    pages = source.pages()
+    while True:
+        fetch_start = time.perf_counter()
+        page = next(pages, None)
+        timings["fetch"] += time.perf_counter() - fetch_start
+        if page is None:
+            break
+
+        stage_start = time.perf_counter()
+        results = evaluate_frame(page)
+        timings["validate"] += time.perf_counter() - stage_start
+
+        stage_start = time.perf_counter()
+        page["Correcciones"] = render_frame(page, results)
+        page.to_csv(output_file, mode="w" if rows == 0 else "a", header=rows == 0, index=False)
+        timings["write"] += time.perf_counter() - stage_start
+
+        if write_back:
+            stage_start = time.perf_counter()
+            fixes = compute_fixes(page, results)
+            source.write_fixes(fixes)
+            fixed += len(fixes)
+            timings["write_back"] += time.perf_counter() - stage_start
+
+        rows += len(page)
+        failures.update(failure_counts(results))
+
+    if rows == 0:
+        pd.DataFrame(columns=["id"] + COLUMNS + ["Correcciones"]).to_csv(output_file, index=False)
+    elapsed = time.perf_counter() - start
+    return {
+        "file": str(source),
+        "output": output_file,
+        "rows": rows,
+        "ok": rows - sum(failures.values()),
+        "revisar": sum(failures.values()),
+        "failures": dict(failures),
+        "fixed": fixed,
+        "timings": dict(timings),
+        "seconds": elapsed,
+        "records_per_second": rows / elapsed if elapsed > 0 else 0.0,
+    }
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Check the Odoo sources against local stand-ins for Odoo.
+
+Builds a set of UoM records with some wrong ratios and serves them through
+a stub XML-RPC server (`SimpleXMLRPCServer`) and a SQLite copy of the
+`uom_uom` and `uom_category` tables. Each source is read page by page,
+validated, fixed with write-back and read again, which must leave no ratio
+failures. Both the Odoo 12 schema (with `measure_type`) and the Odoo 13+
+schema (without it) are checked.
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import xmlrpc.client
+from typing import Any, Dict, List, Optional
+from xmlrpc.server import SimpleXMLRPCRequestHandler, SimpleXMLRPCServer
+
+from differential import random_name
+from odoo_source import SQLSource, XMLRPCSource, process_source
+
+# Categories of the stub database: (id, name, measure_type, reference UoM)
+CATEGORIES = [
+    (1, "Unidad", "unit", "Unidades"),
+    (2, "Volumen", "volume", "Litros"),
+    (3, "Peso", "weight", "Libras"),
+    (4, "Longitud", "length", "Metros"),
+]
+RATIO_FAILURES = {"mayor_ratio", "ratio"}
+
+def build_records(count: int, seed: int, invalid_rate: float) -> List[Dict[str, Any]]:
+    """Generate uom.uom records: one reference per category plus `count` bigger units."""
+    rng = random.Random(seed)
+    category_ids = {code: category_id for category_id, _, code, _ in CATEGORIES}
+    records = [
+        {"id": category_id, "name": reference, "uom_type": "reference", "factor": 1.0,
+         "category_id": category_id, "active": True}
+        for category_id, _, _, reference in CATEGORIES
+    ]
+    while len(records) < count + len(CATEGORIES):
+        name, total, category = random_name(rng)
+        if not total:
+            continue
+        factor = 1 / total
+        if rng.random() < invalid_rate:
+            factor *= rng.choice([0.5, 2, 10])
+        records.append({"id": len(records) + 1, "name": name, "uom_type": "bigger",
+                        "factor": factor, "category_id": category_ids[category],
+                        "active": True})
+    return records
+
+class StubOdoo:
+    """The part of Odoo's external API used by XMLRPCSource, over in-memory records."""
+
+    def __init__(self, records: List[Dict[str, Any]], measure_type: bool):
+        self.records = {record["id"]: dict(record) for record in records}
+        self.measure_type = measure_type
+        self.categories = {category_id: (name, code)
+                           for category_id, name, code, _ in CATEGORIES}
+
+    def authenticate(self, db: str, username: str, password: str, env: Dict) -> int:
+        return 2 if password == "admin" else False
+
+    def execute_kw(self, db: str, uid: int, password: str, model: str, method: str,
+                   args: List[Any], kwargs: Dict[str, Any]) -> Any:
+        if model == "uom.category" and method == "search_read":
+            fields = kwargs.get("fields", [])
+            if "measure_type" in fields and not self.measure_type:
+                raise xmlrpc.client.Fault(2, "Invalid field 'measure_type' on model 'uom.category'")
+            return [{"id": category_id, "name": name, "measure_type": code}
+                    for category_id, (name, code) in self.categories.items()]
+        if model == "uom.uom" and method == "search_read":
+            return self._search_read(args[0], kwargs)
+        if model == "uom.uom" and method == "write":
+            for record_id in args[0]:
+                self.records[record_id].update(args[1])
+            return True
+        raise xmlrpc.client.Fault(1, f"Método no soportado: {model}.{method}")
+
+    def _search_read(self, domain: List[Any], kwargs: Dict[str, Any]) -> List[Dict[str, Any]]:
+        records = [r for r in sorted(self.records.values(), key=lambda r: r["id"])
+                   if r["active"] and all(r[field] == value for field, _, value in domain)]
+        offset = kwargs.get("offset", 0)
+        limit = kwargs.get("limit") or len(records)
+        return [{
+            "id": r["id"],
+            "name": r["name"],
+            "uom_type": r["uom_type"],
+            "factor": r["factor"],
+            # Computed by Odoo from factor
+            "factor_inv": 1 / r["factor"] if r["factor"] else 0.0,
+            "category_id": [r["category_id"], self.categories[r["category_id"]][0]],
+        } for r in records[offset:offset + limit]]
+
+class _OdooPaths(SimpleXMLRPCRequestHandler):
+    rpc_paths = ("/xmlrpc/2/common", "/xmlrpc/2/object")
+
+def serve(stub: StubOdoo) -> SimpleXMLRPCServer:
+    """Serve a stub on a free local port, in a background thread."""
+    server = SimpleXMLRPCServer(("127.0.0.1", 0), requestHandler=_OdooPaths,
+                                allow_none=True, logRequests=False)
+    server.register_instance(stub)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def build_sqlite(records: List[Dict[str, Any]], measure_type: bool) -> sqlite3.Connection:
+    """Build an in-memory SQLite copy of the uom_uom and uom_category tables."""
+    connection = sqlite3.connect(":memory:")
+    if measure_type:
+        connection.execute("CREATE TABLE uom_category (id INTEGER PRIMARY KEY, name TEXT, "
+                           "measure_type TEXT)")
+        connection.executemany("INSERT INTO uom_category VALUES (?, ?, ?)",
+                               [category[:3] for category in CATEGORIES])
+    else:
+        # Odoo 16+ stores translatable names as JSON
+        connection.execute("CREATE TABLE uom_category (id INTEGER PRIMARY KEY, name TEXT)")
+        connection.executemany("INSERT INTO uom_category VALUES (?, ?)",
+                               [(category_id, f'{{"en_US": "{name}"}}')
+                                for category_id, name, _, _ in CATEGORIES])
+    connection.execute("CREATE TABLE uom_uom (id INTEGER PRIMARY KEY, name TEXT, "
+                       "uom_type TEXT, factor REAL, category_id INTEGER, active BOOLEAN)")
+    connection.executemany(
+        "INSERT INTO uom_uom VALUES (:id, :name, :uom_type, :factor, :category_id, :active)",
+        records,
+    )
+    connection.commit()
+    return connection
+
+def check(label: str, source: Any, count: int, output_file: str) -> List[str]:
+    """Validate a source, write fixes back and validate it again.
+
+    Returns:
+        Problems found, empty if the source behaved as expected
+    """
+    before = process_source(source, output_file, write_back=True)
+    after = process_source(source, output_file)
+    ratio_before = sum(before["failures"].get(reason, 0) for reason in RATIO_FAILURES)
+    ratio_after = sum(after["failures"].get(reason, 0) for reason in RATIO_FAILURES)
+    print(f"  {label:<24} {before['rows']} registros, {ratio_before} ratios erróneos, "
+          f"{before['fixed']} corregidos, {ratio_after} tras corregir "
+          f"({before['records_per_second']:,.0f} registros/s)")
+
+    problems = []
+    if before["rows"] != count or after["rows"] != count:
+        problems.append(f"{label}: se leyeron {before['rows']}/{after['rows']} de {count} registros")
+    if before["fixed"] != ratio_before:
+        problems.append(f"{label}: {before['fixed']} correcciones para {ratio_before} ratios erróneos")
+    if ratio_after:
+        problems.append(f"{label}: {ratio_after} ratios erróneos tras corregir")
+    if after["failures"].get("categoria", 0) == after["rows"]:
+        problems.append(f"{label}: todas las filas fallan por categoría")
+    return problems
+
+def run(count: int, seed: int, invalid_rate: float, page_size: int,
+        output_file: Optional[str] = None) -> List[str]:
+    """Check XMLRPCSource and SQLSource on both schemas and print a report."""
+    records = build_records(count, seed, invalid_rate)
+    problems: List[str] = []
+    with tempfile.TemporaryDirectory() as tmp:
+        output_file = output_file or os.path.join(tmp, "Correcciones_UoM.csv")
+        print(f"Fuentes de Odoo ({len(records)} registros, páginas de {page_size})")
+        for measure_type in (True, False):
+            schema = "Odoo 12" if measure_type else "Odoo 13+"
+            server = serve(StubOdoo(records, measure_type))
+            try:
+                host, port = server.server_address[:2]
+                source = XMLRPCSource(f"http://{host}:{port}", "stub", "admin", "admin",
+                                      page_size)
+                problems += check(f"XML-RPC, {schema}", source, len(records), output_file)
+            finally:
+                server.shutdown()
+                server.server_close()
+
+            connection = build_sqlite(records, measure_type)
+            try:
+                problems += check(f"SQLite, {schema}", SQLSource(connection, page_size),
+                                  len(records), output_file)
+            finally:
+                connection.close()
+    for problem in problems:
+        print(f"  ERROR {problem}")
+    return problems
+
+def main() -> None:
+    """Main entry point for the check."""
+    parser = argparse.ArgumentParser(
+        description="Probar las fuentes de Odoo contra un servidor XML-RPC y una base SQLite locales"
+    )
+    parser.add_argument("-n", "--count", type=int, default=5000,
+                        help="Número de unidades generadas")
+    parser.add_argument("--seed", type=int, default=0, help="Semilla aleatoria")
+    parser.add_argument("--invalid-rate", type=float, default=0.2,
+                        help="Probabilidad de generar un ratio erróneo")
+    parser.add_argument("--page-size", type=int, default=500,
+                        help="Registros leídos por página")
+    parser.add_argument("--output", help="Archivo CSV de resultados (por defecto temporal)")
+    args = parser.parse_args()
+
+    problems = run(args.count, args.seed, args.invalid_rate, args.page_size, args.output)
+    sys.exit(1 if problems else 0)
+
+if __name__ == "__main__":
+    main()
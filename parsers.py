@@ -2,8 +2,11 @@
 Functions for parsing unit names and quantities.
 """
 import re
+from functools import lru_cache
 from typing import Tuple, Optional
-from units import PACKAGE_TYPES, PACKAGE_WORDS
+from units import CACHE_SIZE, PACKAGE_TYPES, PACKAGE_WORDS
+
+_NUMBER_RE = re.compile(r'\d+(?:\.\d+)?')
 
 def extract_quantity(text: str, split_on: str = "de") -> Optional[float]:
     """Extract a quantity from text.
@@ -23,7 +26,7 @@ def extract_quantity(text: str, split_on: str = "de") -> Optional[float]:
             pass
     
     # Try finding any number
-    numbers = re.findall(r'\d+(?:\.\d+)?', text)
+    numbers = _NUMBER_RE.findall(text)
     if numbers:
         try:
             return float(numbers[0])
@@ -32,28 +35,31 @@ def extract_quantity(text: str, split_on: str = "de") -> Optional[float]:
             
     return None
 
-def parse_compound_package(name: str) -> Tuple[Optional[float], Optional[float], str, str]:
-    """Parse a compound package name like "Caja de 12 / Botella de 750 ml".
+def match_compound_package(name: str
+                           ) -> Tuple[Optional[float], Optional[float], str, str, Optional[str]]:
+    """Parse a compound package name and report which package token matched.
     
     Args:
         name: Package name to parse
         
     Returns:
-        Tuple of (outer_qty, inner_qty, outer_part, inner_part)
+        Tuple of (outer_qty, inner_qty, outer_part, inner_part, package_token)
     """
     parts = name.split("/")
     if len(parts) != 2:
-        return None, None, "", ""
+        return None, None, "", "", None
         
     outer_part, inner_part = parts[0].strip(), parts[1].strip()
     
     # Extract outer quantity
     outer_qty = None
+    token = None
     # First try package types
     for pkg in PACKAGE_TYPES:
         if pkg in outer_part:
             try:
                 outer_qty = float(outer_part.split(pkg)[1].strip().split(" ")[0])
+                token = pkg
                 break
             except:
                 continue
@@ -63,22 +69,35 @@ def parse_compound_package(name: str) -> Tuple[Optional[float], Optional[float],
         for word in PACKAGE_WORDS:
             if word in outer_part:
                 outer_qty = extract_quantity(outer_part)
+                token = word
                 if outer_qty:
                     break
                     
     # Extract inner quantity
     inner_qty = extract_quantity(inner_part)
     
-    return outer_qty, inner_qty, outer_part, inner_part
+    return outer_qty, inner_qty, outer_part, inner_part, token
 
-def parse_simple_package(name: str) -> Tuple[Optional[float], str]:
-    """Parse a simple package name like "Envase de 750 ml".
+@lru_cache(maxsize=CACHE_SIZE)
+def parse_compound_package(name: str) -> Tuple[Optional[float], Optional[float], str, str]:
+    """Parse a compound package name like "Caja de 12 / Botella de 750 ml".
     
     Args:
         name: Package name to parse
         
     Returns:
-        Tuple of (quantity, rest_of_name)
+        Tuple of (outer_qty, inner_qty, outer_part, inner_part)
+    """
+    return match_compound_package(name)[:4]
+
+def match_simple_package(name: str) -> Tuple[Optional[float], str, Optional[str]]:
+    """Parse a simple package name and report which package type matched.
+    
+    Args:
+        name: Package name to parse
+        
+    Returns:
+        Tuple of (quantity, rest_of_name, package_type)
     """
     for pkg in PACKAGE_TYPES:
         if pkg in name:
@@ -86,8 +105,20 @@ def parse_simple_package(name: str) -> Tuple[Optional[float], str]:
             try:
                 qty = float(split_name)
                 rest_of_name = name.split(split_name, 1)[1].strip()
-                return qty, rest_of_name
+                return qty, rest_of_name, pkg
             except:
                 continue
                 
-    return None, name
+    return None, name, None
+
+@lru_cache(maxsize=CACHE_SIZE)
+def parse_simple_package(name: str) -> Tuple[Optional[float], str]:
+    """Parse a simple package name like "Envase de 750 ml".
+    
+    Args:
+        name: Package name to parse
+        
+    Returns:
+        Tuple of (quantity, rest_of_name)
+    """
+    return match_simple_package(name)[:2]
@@ -2,7 +2,11 @@
 Unit definitions and conversion factors for the UoM validation system.
 """
 from dataclasses import dataclass
-from typing import Dict, List, Tuple, Optional
+from functools import lru_cache
+from typing import Any, Dict, List, Tuple, Optional
+
+import numpy as np
+import pandas as pd
 
 @dataclass
 class UnitDefinition:
@@ -54,30 +58,103 @@ PACKAGE_WORDS = [
 # All units
 ALL_UNITS = VOLUME_UNITS + WEIGHT_UNITS + LENGTH_UNITS + UNIT_TYPES
 
-def get_unit_info(unit_text: str) -> Tuple[float, str]:
-    """Get conversion factor and standardized name for a unit.
+# Reference unit of each category
+REFERENCE_UNITS = {
+    "volume": "litros",
+    "weight": "libras",
+    "length": "metros",
+    "unit": "unidades"
+}
+
+# Units available for conversion: every defined unit plus the reference units
+# that have no definition of their own (e.g. metros).
+CONVERSION_UNITS = ALL_UNITS + [
+    UnitDefinition(reference, reference, 1.0, category, [reference])
+    for category, reference in REFERENCE_UNITS.items()
+    if not any(unit.name.lower() == reference for unit in ALL_UNITS)
+]
+
+# Lowercase names and patterns -> position in CONVERSION_UNITS
+UNIT_INDEX: Dict[str, int] = {}
+for _i, _unit in enumerate(CONVERSION_UNITS):
+    for _key in [_unit.name] + _unit.patterns:
+        UNIT_INDEX.setdefault(_key.lower(), _i)
+
+# CONVERSION_MATRIX[i, j] converts a value in unit i to unit j. Conversions
+# across categories are NaN.
+_factors = np.array([unit.conversion_factor for unit in CONVERSION_UNITS])
+_categories = np.array([unit.category for unit in CONVERSION_UNITS])
+CONVERSION_MATRIX = np.where(
+    _categories[:, None] == _categories[None, :],
+    _factors[:, None] / _factors[None, :],
+    np.nan,
+)
+
+# Matchers built once at import: specific patterns (longer than 2 chars) are
+# tried before the short ones, so "kg" or "ml" win over a bare "g".
+_SPECIFIC_MATCHERS = [
+    (unit, tuple(p for p in unit.patterns if len(p) > 2)) for unit in ALL_UNITS
+]
+_ALL_MATCHERS = [(unit, tuple(unit.patterns)) for unit in ALL_UNITS]
+
+# Size of the per-process caches for unit lookups. UoM catalogs repeat the
+# same names many times, so a modest cache covers most of a file.
+CACHE_SIZE = 65536
+
+def _first_match(unit_text: str, matchers: List[Tuple[UnitDefinition, Tuple[str, ...]]]
+                 ) -> Optional[Tuple[UnitDefinition, str]]:
+    for unit, patterns in matchers:
+        for pattern in patterns:
+            if pattern in unit_text:
+                return unit, pattern
+    return None
+
+def match_unit(unit_text: str) -> Optional[Tuple[UnitDefinition, str, int]]:
+    """Find the unit definition a text refers to.
     
     Args:
         unit_text: The text containing the unit name
         
     Returns:
-        Tuple of (conversion_factor, standardized_name)
+        Tuple of (unit, matched pattern, priority) or None if no match.
+        Priority 1 means a specific pattern matched, 2 a short one.
     """
     unit_text = unit_text.lower()
+    for priority, matchers in enumerate((_SPECIFIC_MATCHERS, _ALL_MATCHERS), 1):
+        match = _first_match(unit_text, matchers)
+        if match:
+            return match[0], match[1], priority
+    return None
+
+def match_category(unit_text: str) -> Optional[Tuple[UnitDefinition, str]]:
+    """Find the first unit definition with a pattern in the text.
     
-    # First check specific patterns
-    for unit in ALL_UNITS:
-        if any(pattern in unit_text and len(pattern) > 2 for pattern in unit.patterns):
-            return unit.conversion_factor, unit.name
+    Args:
+        unit_text: The text containing the unit name
+        
+    Returns:
+        Tuple of (unit, matched pattern) or None if no match
+    """
+    return _first_match(unit_text.lower(), _ALL_MATCHERS)
+
+@lru_cache(maxsize=CACHE_SIZE)
+def get_unit_info(unit_text: str) -> Tuple[float, str]:
+    """Get conversion factor and standardized name for a unit.
     
-    # Then check shorter patterns
-    for unit in ALL_UNITS:
-        if any(pattern in unit_text for pattern in unit.patterns):
-            return unit.conversion_factor, unit.name
+    Args:
+        unit_text: The text containing the unit name
+        
+    Returns:
+        Tuple of (conversion_factor, standardized_name)
+    """
+    match = match_unit(unit_text)
+    if match:
+        return match[0].conversion_factor, match[0].name
             
     # Default to unit type if no match
     return 1.0, ""
 
+@lru_cache(maxsize=CACHE_SIZE)
 def get_base_category(unit_text: str) -> Optional[str]:
     """Get the base category for a unit text.
     
@@ -87,14 +164,8 @@ def get_base_category(unit_text: str) -> Optional[str]:
     Returns:
         Category name or None if no match
     """
-    unit_text = unit_text.lower()
-    
-    # Find matching unit definition
-    for unit in ALL_UNITS:
-        if any(pattern in unit_text for pattern in unit.patterns):
-            return unit.category
-            
-    return None
+    match = match_category(unit_text)
+    return match[0].category if match else None
 
 def get_reference_unit(category: str) -> str:
     """Get the reference unit name for a category.
@@ -105,10 +176,77 @@ def get_reference_unit(category: str) -> str:
     Returns:
         Reference unit name
     """
-    reference_units = {
-        "volume": "litros",
-        "weight": "libras", 
-        "length": "metros",
-        "unit": "unidades"
-    }
-    return reference_units.get(category, "unidades")
+    return REFERENCE_UNITS.get(category, "unidades")
+
+def conversion_table(category: str) -> Tuple[List[str], np.ndarray]:
+    """Get the conversion table between the units of a category.
+    
+    Args:
+        category: The unit category
+        
+    Returns:
+        Tuple of (unit names, matrix) where matrix[i, j] converts a value in
+        the i-th unit to the j-th unit
+    """
+    indices = [i for i, unit in enumerate(CONVERSION_UNITS) if unit.category == category]
+    names = [CONVERSION_UNITS[i].name for i in indices]
+    return names, CONVERSION_MATRIX[np.ix_(indices, indices)]
+
+def _unit_indices(units: Any) -> Any:
+    """Map a unit name, or an array of unit names, to CONVERSION_UNITS positions."""
+    if isinstance(units, str):
+        try:
+            return UNIT_INDEX[units.strip().lower()]
+        except KeyError:
+            raise ValueError(f"Unidad desconocida: '{units}'") from None
+    if not isinstance(units, (pd.Series, pd.Index, pd.Categorical)):
+        units = np.asarray(units, dtype=object)
+    codes, unique = pd.factorize(units)
+    if (codes < 0).any():
+        raise ValueError("Unidad desconocida: valor vacío")
+    return np.array([_unit_indices(str(unit)) for unit in unique], dtype=np.intp)[codes]
+
+def _align_units(units: Any, values: Any) -> Any:
+    """Reorder a Series of units to the index of a Series of values."""
+    if not (isinstance(units, pd.Series) and isinstance(values, pd.Series)):
+        return units
+    if units.index.equals(values.index):
+        return units
+    if (not units.index.is_unique or len(units.index) != len(values.index)
+            or not values.index.isin(units.index).all()):
+        raise ValueError("El índice de las unidades no coincide con el de los valores")
+    return units.reindex(values.index)
+
+def convert(values: Any, from_unit: Any, to_unit: Any) -> Any:
+    """Convert values between units of the same category.
+    
+    Works on scalars, lists, NumPy arrays and pandas Series (the index is
+    kept). Units are names or patterns such as "ml", "Fl Oz" or "kg"; either
+    may also be an array of units, one per value; a Series of units is
+    aligned by index with a Series of values, other arrays by position.
+    
+    Args:
+        values: Values expressed in from_unit
+        from_unit: Unit of the values
+        to_unit: Unit to convert to
+        
+    Returns:
+        Converted values, of the same kind as values
+        
+    Raises:
+        ValueError: If a unit is unknown, the units are of different categories
+            or a Series of units has a different index than the values
+    """
+    from_index = _unit_indices(_align_units(from_unit, values))
+    to_index = _unit_indices(_align_units(to_unit, values))
+    factors = CONVERSION_MATRIX[from_index, to_index]
+    invalid = np.isnan(factors)
+    if np.any(invalid):
+        i = np.flatnonzero(invalid)[0]
+        source = CONVERSION_UNITS[np.broadcast_to(from_index, invalid.shape).flat[i]]
+        target = CONVERSION_UNITS[np.broadcast_to(to_index, invalid.shape).flat[i]]
+        raise ValueError(
+            f"No se puede convertir de '{source.name}' ({source.category}) "
+            f"a '{target.name}' ({target.category})"
+        )
+    return np.multiply(values, factors)
@@ -1,13 +1,28 @@
 """
 Core validation logic for UoM validation.
 """
-from typing import Optional, Dict, Any
+import math
+from typing import Optional, Dict, Any, NamedTuple
+
+import numpy as np
+import pandas as pd
+
 from units import (
     get_unit_info, get_base_category, get_reference_unit,
-    PACKAGE_TYPES, PACKAGE_WORDS
+    ALL_UNITS, PACKAGE_TYPES, PACKAGE_WORDS
 )
 from parsers import parse_compound_package, parse_simple_package
 
+NAN = float("nan")
+
+# CSV columns read by validate_uom
+COLUMNS = [
+    "Unidad de medida", "Tipo", "Mayor ratio", "Ratio", "Tipo de categoría de medida"
+]
+
+# Text columns are read as str so a numeric-looking name stays a string
+TEXT_DTYPES = {"Unidad de medida": str, "Tipo": str, "Tipo de categoría de medida": str}
+
 def validate_name_only(name: str) -> str:
     """Validate just the unit name and determine its category.
     
@@ -70,19 +85,57 @@ def validate_name_only(name: str) -> str:
     except:
         return "Unidad sin cantidad numérica"
 
-def validate_uom(row: Dict[str, Any]) -> str:
-    """Validate a UoM row from the CSV file.
+class Evaluation(NamedTuple):
+    """Structured result of validating a UoM row.
+    
+    `status` is "ok" or one of the failure reasons in STATUSES. The
+    numeric fields are NaN when the validation stopped before computing them.
+    """
+    status: str
+    unit: str = ""
+    outer_qty: float = NAN
+    qty: float = NAN
+    total_in_reference: float = NAN
+    expected_ratio: float = NAN
+    actual_ratio: float = NAN
+
+# Columns of the compact result frame, matching the Evaluation fields
+RESULT_COLUMNS = [
+    "Estado", "Unidad", "Cantidad externa", "Cantidad",
+    "Total en referencia", "Ratio esperado", "Ratio actual"
+]
+
+# Status codes, in the order of the "Estado" categorical; every status but
+# "ok" is a failure reason
+STATUSES = [
+    "ok", "valor_invalido", "error", "categoria", "referencia",
+    "cantidades", "cantidad", "mayor_ratio", "ratio"
+]
+_STATUS_CODES = {status: code for code, status in enumerate(STATUSES)}
+
+# Unit names get_unit_info can return, in the order of the "Unidad" categorical
+UNIT_NAMES = [""] + [unit.name for unit in ALL_UNITS]
+_UNIT_CODES = {name: code for code, name in enumerate(UNIT_NAMES)}
+
+def evaluate_uom(row: Dict[str, Any]) -> Evaluation:
+    """Validate a UoM row from the CSV file into a structured result.
     
     Args:
         row: CSV row data
         
     Returns:
-        Validation result message
+        Evaluation with the status code and the numbers behind it
     """
     name = row["Unidad de medida"]
     tipo = row["Tipo"]
-    mayor_ratio = float(row["Mayor ratio"])
-    ratio = float(row["Ratio"])
+    try:
+        mayor_ratio = float(row["Mayor ratio"])
+        ratio = float(row["Ratio"])
+    except (TypeError, ValueError):
+        return Evaluation("valor_invalido")
+    # An empty cell is read as NaN, which would pass every ratio check.
+    if math.isnan(mayor_ratio) or math.isnan(ratio):
+        return Evaluation("valor_invalido")
     categoria = row["Tipo de categoría de medida"]
     
     # Get base category
@@ -92,20 +145,21 @@ def validate_uom(row: Dict[str, Any]) -> str:
         
     # Verify category matches
     if categoria != base_category:
-        return f"Revisar: Tipo de categoría incorrecto, esperado {base_category}."
+        return Evaluation("categoria")
         
     # Verify reference unit
     if tipo == "Unidad de medida de referencia para esta categoría" and mayor_ratio != 1:
-        return "Revisar: La unidad de referencia debe tener Mayor ratio = 1."
+        return Evaluation("referencia", actual_ratio=mayor_ratio)
         
     # Validate ratios based on package type
     if "/" in name:
-        return validate_compound_package(name, tipo, mayor_ratio, ratio)
+        return evaluate_compound_package(name, tipo, mayor_ratio, ratio)
     else:
-        return validate_simple_package(name, tipo, mayor_ratio, ratio)
+        return evaluate_simple_package(name, tipo, mayor_ratio, ratio)
 
-def validate_compound_package(name: str, tipo: str, mayor_ratio: float, ratio: float) -> str:
-    """Validate a compound package UoM.
+def evaluate_compound_package(name: str, tipo: str, mayor_ratio: float,
+                              ratio: float) -> Evaluation:
+    """Validate a compound package UoM into a structured result.
     
     Args:
         name: Package name
@@ -114,35 +168,23 @@ def validate_compound_package(name: str, tipo: str, mayor_ratio: float, ratio: f
         ratio: Ratio value
         
     Returns:
-        Validation result message
+        Evaluation with the status code and the numbers behind it
     """
     outer_qty, inner_qty, _, inner_part = parse_compound_package(name)
     if not outer_qty or not inner_qty:
-        return "Revisar: No se pudo extraer las cantidades"
+        return Evaluation("cantidades")
         
     # Get conversion factors
     conversion_factor, unit_name = get_unit_info(inner_part)
     
     # Calculate totals
-    total_qty = outer_qty * inner_qty
-    total_in_reference = total_qty * conversion_factor
-    
-    if tipo == "Más grande que la unidad de medida de referencia":
-        if abs(total_in_reference - mayor_ratio) > 0.01:
-            return (f"Revisar: {outer_qty}x{inner_qty}={total_qty} {unit_name}. "
-                    f"Total en unidades de referencia: {total_in_reference:.6f}. "
-                    f"Mayor ratio esperado: {total_in_reference:.6f}, pero es {mayor_ratio}")
-    else:  # "Más pequeña que la unidad de medida de referencia"
-        expected_ratio = 1 / total_in_reference if total_in_reference != 0 else 0
-        if abs(expected_ratio - ratio) > 0.01:
-            return (f"Revisar: {outer_qty}x{inner_qty}={total_qty} {unit_name}. "
-                    f"Total en unidades de referencia: {total_in_reference:.6f}. "
-                    f"Ratio esperado: {expected_ratio:.6f}, pero es {ratio}")
-                    
-    return "OK"
+    total_in_reference = outer_qty * inner_qty * conversion_factor
+    return _check_ratios(tipo, mayor_ratio, ratio, unit_name, outer_qty, inner_qty,
+                         total_in_reference)
 
-def validate_simple_package(name: str, tipo: str, mayor_ratio: float, ratio: float) -> str:
-    """Validate a simple package UoM.
+def evaluate_simple_package(name: str, tipo: str, mayor_ratio: float,
+                            ratio: float) -> Evaluation:
+    """Validate a simple package UoM into a structured result.
     
     Args:
         name: Package name
@@ -151,26 +193,196 @@ def validate_simple_package(name: str, tipo: str, mayor_ratio: float, ratio: flo
         ratio: Ratio value
         
     Returns:
-        Validation result message
+        Evaluation with the status code and the numbers behind it
     """
     qty, rest_of_name = parse_simple_package(name)
     if not qty:
-        return "Revisar: No se pudo extraer la cantidad"
+        return Evaluation("cantidad")
         
     # Get conversion factors
     conversion_factor, unit_name = get_unit_info(name)
     total_in_reference = qty * conversion_factor
-    
+    return _check_ratios(tipo, mayor_ratio, ratio, unit_name, NAN, qty, total_in_reference)
+
+def _check_ratios(tipo: str, mayor_ratio: float, ratio: float, unit_name: str,
+                  outer_qty: float, qty: float, total_in_reference: float) -> Evaluation:
+    """Compare the row's ratio with the one expected from the name."""
     if tipo == "Más grande que la unidad de medida de referencia":
         if abs(total_in_reference - mayor_ratio) > 0.01:
-            return (f"Revisar: El nombre indica {qty} {unit_name}. "
-                    f"Total en unidades de referencia: {total_in_reference:.6f}. "
-                    f"Mayor ratio esperado: {total_in_reference:.6f}, pero es {mayor_ratio}")
+            return Evaluation("mayor_ratio", unit_name, outer_qty, qty, total_in_reference,
+                              total_in_reference, mayor_ratio)
+        return Evaluation("ok", unit_name, outer_qty, qty, total_in_reference,
+                          total_in_reference, mayor_ratio)
     else:  # "Más pequeña que la unidad de medida de referencia"
         expected_ratio = 1 / total_in_reference if total_in_reference != 0 else 0
         if abs(expected_ratio - ratio) > 0.01:
-            return (f"Revisar: El nombre indica {qty} {unit_name}. "
-                    f"Total en unidades de referencia: {total_in_reference:.6f}. "
-                    f"Ratio esperado: {expected_ratio:.6f}, pero es {ratio}")
-                    
-    return "OK"
+            return Evaluation("ratio", unit_name, outer_qty, qty, total_in_reference,
+                              expected_ratio, ratio)
+        return Evaluation("ok", unit_name, outer_qty, qty, total_in_reference,
+                          expected_ratio, ratio)
+
+def render_message(result: Evaluation, row: Optional[Dict[str, Any]] = None) -> str:
+    """Render the human-readable message of a structured result.
+    
+    Args:
+        result: Evaluation to render
+        row: CSV row the result belongs to; needed for the "valor_invalido",
+            "categoria" and "error" statuses
+        
+    Returns:
+        Validation result message
+    """
+    status = result.status
+    if status == "ok":
+        return "OK"
+    if status == "valor_invalido":
+        return (f"Revisar: Valor numérico inválido. "
+                f"Mayor ratio = {row['Mayor ratio']}, Ratio = {row['Ratio']}")
+    if status == "error":
+        return _validate_row(row)
+    if status == "categoria":
+        base_category = get_base_category(row["Unidad de medida"])
+        return f"Revisar: Tipo de categoría incorrecto, esperado {base_category}."
+    if status == "referencia":
+        return "Revisar: La unidad de referencia debe tener Mayor ratio = 1."
+    if status == "cantidades":
+        return "Revisar: No se pudo extraer las cantidades"
+    if status == "cantidad":
+        return "Revisar: No se pudo extraer la cantidad"
+
+    if math.isnan(result.outer_qty):
+        head = f"Revisar: El nombre indica {result.qty} {result.unit}. "
+    else:
+        total_qty = result.outer_qty * result.qty
+        head = f"Revisar: {result.outer_qty}x{result.qty}={total_qty} {result.unit}. "
+    label = "Mayor ratio esperado" if status == "mayor_ratio" else "Ratio esperado"
+    return (f"{head}Total en unidades de referencia: {result.total_in_reference:.6f}. "
+            f"{label}: {result.expected_ratio:.6f}, pero es {result.actual_ratio}")
+
+def validate_uom(row: Dict[str, Any]) -> str:
+    """Validate a UoM row from the CSV file.
+    
+    Args:
+        row: CSV row data
+        
+    Returns:
+        Validation result message
+    """
+    return render_message(evaluate_uom(row), row)
+
+def evaluate_frame(df: pd.DataFrame, chunksize: int = 5_000) -> pd.DataFrame:
+    """Validate every row of a UoM DataFrame into compact result columns.
+    
+    "Estado" and "Unidad" are categoricals and the rest are float columns,
+    so no per-row message string is kept; messages are rendered on demand
+    with render_frame. Rows are evaluated a small chunk at a time straight
+    into preallocated arrays, so the per-row Python objects of one chunk are
+    all that exists besides the input.
+    
+    Args:
+        df: DataFrame with the CSV columns
+        chunksize: Rows evaluated at a time
+        
+    Returns:
+        DataFrame with RESULT_COLUMNS aligned with df
+    """
+    statuses = np.empty(len(df), dtype=np.int8)
+    units = np.empty(len(df), dtype=np.int8)
+    numbers = np.empty((len(RESULT_COLUMNS) - 2, len(df)), dtype=float)
+    for start in range(0, len(df), chunksize):
+        chunk = df.iloc[start:start + chunksize]
+        results = []
+        for values in zip(*(chunk[column].tolist() for column in COLUMNS)):
+            try:
+                results.append(evaluate_uom(dict(zip(COLUMNS, values))))
+            except Exception:
+                results.append(Evaluation("error"))
+        stop = start + len(results)
+        fields = list(zip(*results))
+        statuses[start:stop] = [_STATUS_CODES[status] for status in fields[0]]
+        units[start:stop] = [_UNIT_CODES[unit] for unit in fields[1]]
+        numbers[:, start:stop] = fields[2:]
+    return pd.DataFrame({
+        "Estado": pd.Categorical.from_codes(statuses, categories=STATUSES),
+        "Unidad": pd.Categorical.from_codes(units, categories=UNIT_NAMES),
+        **dict(zip(RESULT_COLUMNS[2:], numbers)),
+    }, index=df.index)
+
+def render_frame(df: pd.DataFrame, results: pd.DataFrame) -> pd.Series:
+    """Render the messages of compact results.
+    
+    Args:
+        df: DataFrame with the CSV columns
+        results: Compact results from evaluate_frame, aligned with df
+        
+    Returns:
+        Series of validation result messages aligned with df
+    """
+    messages = pd.Series("OK", index=df.index, dtype=object)
+    failed = (results["Estado"] != "ok").to_numpy()
+    if failed.any():
+        rows = zip(*(df.loc[failed, column].tolist() for column in COLUMNS))
+        evaluations = results[failed].itertuples(index=False, name=None)
+        messages[failed] = [render_message(Evaluation(*values), dict(zip(COLUMNS, row)))
+                            for values, row in zip(evaluations, rows)]
+    return messages
+
+def failure_counts(results: pd.DataFrame) -> Dict[str, int]:
+    """Count compact results by failure reason.
+    
+    Args:
+        results: Compact results from evaluate_frame
+        
+    Returns:
+        Number of rows per failure reason, omitting reasons with no rows
+    """
+    counts = results["Estado"].value_counts(sort=False)
+    return {status: int(n) for status, n in counts.items() if status != "ok" and n}
+
+def validate_frame(df: pd.DataFrame) -> pd.Series:
+    """Validate every row of a UoM DataFrame.
+    
+    Args:
+        df: DataFrame with the CSV columns
+        
+    Returns:
+        Series of validation result messages aligned with df
+    """
+    if not len(df):
+        return pd.Series(index=df.index, dtype=object)
+    return render_frame(df, evaluate_frame(df))
+
+def _validate_row(row: Dict[str, Any]) -> str:
+    """Validate a row, turning unexpected errors into a row-level result."""
+    try:
+        return validate_uom(row)
+    except Exception as e:
+        return f"Revisar: Error al validar la fila ({type(e).__name__}: {e})"
+
+def validate_compound_package(name: str, tipo: str, mayor_ratio: float, ratio: float) -> str:
+    """Validate a compound package UoM.
+    
+    Args:
+        name: Package name
+        tipo: UoM type
+        mayor_ratio: Mayor ratio value
+        ratio: Ratio value
+        
+    Returns:
+        Validation result message
+    """
+    return render_message(evaluate_compound_package(name, tipo, mayor_ratio, ratio))
+
+def validate_simple_package(name: str, tipo: str, mayor_ratio: float, ratio: float) -> str:
+    """Validate a simple package UoM.
+    
+    Args:
+        name: Package name
+        tipo: UoM type
+        mayor_ratio: Mayor ratio value
+        ratio: Ratio value
+        
+    Returns:
+        Validation result message
+    """
+    return render_message(evaluate_simple_package(name, tipo, mayor_ratio, ratio))
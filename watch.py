@@ -0,0 +1,122 @@
+"""
+Watch mode: re-validate a UoM file whenever it changes on disk.
+"""
+import io
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from validators import TEXT_DTYPES, validate_frame
+
+def _records(text: str) -> List[str]:
+    """Split CSV text into the raw text of each record.
+
+    Lines are joined while a quoted field is open, so a field with line
+    breaks stays in one record. Blank lines between records are skipped.
+    """
+    if '"' not in text:
+        return [line for line in text.splitlines() if line]
+    records: List[str] = []
+    pending: List[str] = []
+    quotes = 0
+    for line in text.splitlines():
+        if not pending and not line:
+            continue
+        pending.append(line)
+        quotes += line.count('"')
+        if quotes % 2 == 0:
+            records.append("\n".join(pending))
+            pending, quotes = [], 0
+    if pending:
+        records.append("\n".join(pending))
+    return records
+
+def _csv_field(value: str) -> str:
+    """Quote a value for use as a CSV field, as pandas would."""
+    if any(c in value for c in ',"\r\n'):
+        return '"' + value.replace('"', '""') + '"'
+    return value
+
+class UoMWatcher:
+    """Keep a UoM file's results in memory and re-validate only changed rows.
+
+    The output is cached per raw CSV record, so an edited, inserted or moved
+    row is parsed and validated once and every untouched row reuses its
+    previous output line without going through pandas. Each output row is
+    the input record's text as-is plus the "Correcciones" field, so numbers
+    keep their input formatting (a `-f` run writes them back through pandas,
+    e.g. `1` as `1.0`); the "Correcciones" values are the same.
+    """
+
+    def __init__(self, input_file: str, output_file: str, interval: float = 1.0):
+        self.input_file = input_file
+        self.output_file = output_file
+        self.interval = interval
+        self._header: Optional[str] = None
+        self._lines: Dict[str, str] = {}
+        self._stamp: Optional[Tuple[int, int]] = None
+
+    def _file_stamp(self) -> Tuple[int, int]:
+        stat = os.stat(self.input_file)
+        return stat.st_mtime_ns, stat.st_size
+
+    def _validate_lines(self, header: str, lines: List[str]) -> List[str]:
+        # Fixed dtypes: a subset must parse like the same rows in the full file.
+        df = pd.read_csv(io.StringIO("\n".join([header] + lines)), dtype=TEXT_DTYPES)
+        results = validate_frame(df)
+        return [f"{line},{_csv_field(result)}" for line, result in zip(lines, results)]
+
+    def refresh(self) -> Dict[str, Any]:
+        """Re-read the file, validate new or changed rows and rewrite the output.
+
+        Returns:
+            Summary with total rows, re-validated rows and elapsed seconds
+        """
+        start = time.perf_counter()
+        self._stamp = self._file_stamp()
+        with open(self.input_file, encoding="utf-8-sig") as f:
+            content = _records(f.read())
+        if not content:
+            # Empty, e.g. just truncated by an editor: no rows yet.
+            return {"rows": 0, "changed": 0, "ok": 0, "seconds": time.perf_counter() - start}
+        header, *lines = content
+
+        if header != self._header:
+            self._header, self._lines = header, {}
+        new_lines = list(dict.fromkeys(l for l in lines if l not in self._lines))
+        if new_lines:
+            self._lines.update(zip(new_lines, self._validate_lines(header, new_lines)))
+        output = [self._lines[line] for line in lines]
+        self._lines = dict(zip(lines, output))
+        body = "\n".join([f"{header},Correcciones"] + output) + "\n"
+
+        tmp_file = self.output_file + ".tmp"
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            f.write(body)
+        os.replace(tmp_file, self.output_file)
+
+        return {
+            "rows": len(lines),
+            "changed": len(new_lines),
+            "ok": body.count(",OK\n"),
+            "seconds": time.perf_counter() - start,
+        }
+
+    def run(self) -> None:
+        """Validate the file, then poll it and refresh on every change."""
+        while True:
+            try:
+                # The first refresh is retried like the others if it fails.
+                if self._stamp is None or self._file_stamp() != self._stamp:
+                    self._report(self.refresh())
+            except Exception as e:
+                # The file may be mid-save; the next write triggers a retry.
+                print(f"Error procesando archivo: {e}")
+            time.sleep(self.interval)
+
+    def _report(self, summary: Dict[str, Any]) -> None:
+        print(f"{self.input_file}: {summary['changed']} de {summary['rows']} filas "
+              f"revalidadas, {summary['ok']} OK ({summary['seconds'] * 1000:.0f} ms). "
+              f"Resultados en '{self.output_file}'")